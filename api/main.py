@@ -7,29 +7,119 @@ from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+import atexit
+import logging
+import logging.handlers
 import os
+import queue
+import re
+import sys
 from collections import defaultdict
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
+from typing import FrozenSet, Optional, Tuple
+import httpx
+import orjson
+
+from backend.settings import ASSETS_DIR, UPLOAD_DIR, ensure_data_dirs
+from sheyla_security import SheylaSecurityGuard
 
 # Import route modules
-from routes.chat import router as chat_router
-# from routes.actions import router as actions_router  # UNUSED - No actions.py locally
+from routes.chat import router as chat_router, warm_up_engines, QUICK_PROMPT_TEXTS
 from routes.health import router as health_router
 # Deprecated upload/RAG/debug routes are archived under api/routes/archive/.
 # They are intentionally not imported or mounted in production.
-# from routes.validation import router as validation_router  # UNUSED - Not called by frontend
+
+# Default timeouts for the shared outbound client; connect/pool fail fast so
+# an unreachable dependency doesn't hold a request for the full read budget
+HTTP_TIMEOUT = httpx.Timeout(15.0, connect=2.0, pool=1.0)
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
 
 ENVIRONMENT = os.getenv("ENVIRONMENT", os.getenv("APP_ENV", "development")).lower()
 IS_PRODUCTION = ENVIRONMENT == "production"
+# Tags log lines when uvicorn runs several workers (WEB_CONCURRENCY > 1)
+WORKER_ID = os.getenv("WORKER_ID") or str(os.getpid())
+
+
+class WorkerIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.worker_id = WORKER_ID
+        return True
+
+
+class JsonLogFormatter(logging.Formatter):
+    """One JSON object per line, so the log pipeline doesn't have to parse text"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "worker": getattr(record, "worker_id", WORKER_ID),
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry).decode()
+
+
+def configure_logging() -> None:
+    """
+    Route app logging through a QueueHandler: the event loop only enqueues
+    records, and a listener thread formats and writes them to stdout.
+    LOG_FORMAT=json|text (json by default in production), LOG_LEVEL=INFO.
+    """
+    log_format = os.getenv("LOG_FORMAT", "json" if IS_PRODUCTION else "text").lower()
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.addFilter(WorkerIdFilter())
+    if log_format == "json":
+        stream_handler.setFormatter(JsonLogFormatter())
+    else:
+        stream_handler.setFormatter(
+            logging.Formatter("%(asctime)s [%(worker_id)s] %(levelname)s %(name)s: %(message)s")
+        )
+
+    log_queue: queue.Queue = queue.Queue(-1)
+    listener = logging.handlers.QueueListener(
+        log_queue, stream_handler, respect_handler_level=True
+    )
+    root = logging.getLogger()
+    root.handlers[:] = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+    # httpx logs every outbound request (incl. the LLM SDKs) at INFO
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    listener.start()
+    # Flush whatever is still queued when the worker exits
+    atexit.register(listener.stop)
+
+
+configure_logging()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Per-worker startup: build request-path singletons once, on app.state"""
+    app.state.security = SheylaSecurityGuard(trusted_prompts=QUICK_PROMPT_TEXTS)
+    # One pooled client per worker so outbound checks reuse keep-alive
+    # connections instead of a new TCP+TLS handshake per request
+    app.state.http = httpx.AsyncClient(timeout=HTTP_TIMEOUT, limits=HTTP_LIMITS)
+    await warm_up_engines()
+    yield
+    await app.state.http.aclose()
+
 
 # Create FastAPI app
 app = FastAPI(
+    lifespan=lifespan,
     title="Portfolio API",
     description="Backend API for Jimmie's AI-powered portfolio platform",
     version="2.0.0",
     docs_url=None if IS_PRODUCTION else "/docs",
     redoc_url=None if IS_PRODUCTION else "/redoc",
     openapi_url=None if IS_PRODUCTION else "/openapi.json",
+    # orjson encodes in C and returns bytes directly (3-5x faster than stdlib json)
+    default_response_class=ORJSONResponse,
 )
 
 # Simple rate limiting (in-memory)
@@ -102,23 +192,70 @@ async def rate_limiting(request: Request, call_next):
     return await call_next(request)
 
 
+class StreamAwareGZipMiddleware(GZipMiddleware):
+    """GZip, except for SSE routes (the compressor would hold back events)"""
+
+    NO_GZIP_PATHS = frozenset({"/chat/stream"})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in self.NO_GZIP_PATHS:
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
 # Add compression
-app.add_middleware(GZipMiddleware, minimum_size=1000)
+app.add_middleware(StreamAwareGZipMiddleware, minimum_size=1000)
+
+
+def parse_cors_origins(raw: str) -> Tuple[FrozenSet[str], Optional[str]]:
+    """
+    Parse CORS_ORIGINS once at startup.
+
+    Exact origins become a frozenset (O(1) membership per preflight).
+    Wildcard entries such as https://*.linksmlm.com (one DNS label per *)
+    are folded into a single anchored regex for allow_origin_regex.
+    """
+    exact = set()
+    wildcard_patterns = []
+    for origin in raw.split(","):
+        origin = origin.strip().rstrip("/")
+        if not origin:
+            continue
+        if "*" in origin and origin != "*":
+            wildcard_patterns.append(
+                "[A-Za-z0-9-]+".join(re.escape(part) for part in origin.split("*"))
+            )
+        else:
+            exact.add(origin)
+
+    origin_regex = None
+    if wildcard_patterns:
+        origin_regex = "^(?:" + "|".join(wildcard_patterns) + ")$"
+    return frozenset(exact), origin_regex
+
 
 # Configure CORS - strict for production
-CORS_ORIGINS = os.getenv("CORS_ORIGINS", "https://linksmlm.com").split(",")
+# Starlette joins methods/headers into the preflight header strings once
+# at middleware init, so these only need to be immutable constants here.
+CORS_ORIGINS, CORS_ORIGIN_REGEX = parse_cors_origins(
+    os.getenv("CORS_ORIGINS", "https://linksmlm.com")
+)
+CORS_ALLOW_METHODS = ("GET", "POST", "OPTIONS")
+CORS_ALLOW_HEADERS = ("Content-Type",)
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[origin.strip() for origin in CORS_ORIGINS],
+    allow_origins=CORS_ORIGINS,
+    allow_origin_regex=CORS_ORIGIN_REGEX,
     allow_credentials=False,  # More secure
-    allow_methods=["GET", "POST", "OPTIONS"],
-    allow_headers=["Content-Type"],
+    allow_methods=CORS_ALLOW_METHODS,
+    allow_headers=CORS_ALLOW_HEADERS,
 )
 
-# Configure static file serving
-DATA_DIR = os.getenv("DATA_DIR", "/data")
-app.mount("/uploads", StaticFiles(directory=f"{DATA_DIR}/uploads"), name="uploads")
-app.mount("/assets", StaticFiles(directory=f"{DATA_DIR}/assets"), name="assets")
+# Configure static file serving (StaticFiles needs the directories to exist)
+ensure_data_dirs()
+app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
+app.mount("/assets", StaticFiles(directory=ASSETS_DIR), name="assets")
 
 
 # Health check endpoint
@@ -132,9 +269,7 @@ def health_check():
 # NOTE: Traefik middleware strips /api prefix, so routes should be registered without it
 app.include_router(health_router, tags=["health"])
 app.include_router(chat_router, tags=["chat"])
-# app.include_router(actions_router, tags=["avatar"])  # UNUSED - Avatar endpoints not called
 # Archived routes remain unmounted to keep the production API surface small.
-# app.include_router(validation_router, prefix="/api/validation", tags=["validation"])  # UNUSED
 
 
 # Root endpoint
@@ -1,8 +1,16 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from typing import Any, Dict
+import asyncio
+import logging
+import httpx
 import settings
 
 router = APIRouter(prefix="/api/debug", tags=["debug"])
 
+# Built once and reused for every probe
+CHROMA_PROBE_TIMEOUT = httpx.Timeout(5.0, connect=2.0)
+LLM_PROBE_TIMEOUT = httpx.Timeout(10.0, connect=2.0)
+
 
 # Only enable debug endpoints if DEBUG_MODE is True
 def debug_enabled():
@@ -10,8 +18,67 @@ def debug_enabled():
         raise HTTPException(403, "Debug endpoints disabled in production")
 
 
+async def _probe_chroma(client: httpx.AsyncClient) -> Dict[str, Any]:
+    """Check ChromaDB connectivity and list collections"""
+    out: Dict[str, Any] = {"collections": [], "chroma_ok": False}
+    try:
+        chroma_url = str(settings.CHROMA_URL).rstrip("/")
+        response = await client.get(f"{chroma_url}/api/v1/collections", timeout=CHROMA_PROBE_TIMEOUT)
+        if response.status_code == 200:
+            collections_data = response.json()
+            out["collections"] = (
+                [col["name"] for col in collections_data]
+                if isinstance(collections_data, list)
+                else []
+            )
+            out["chroma_ok"] = True
+    except Exception as e:
+        out["chroma_error"] = str(e)
+    return out
+
+
+async def _probe_llm(client: httpx.AsyncClient) -> Dict[str, Any]:
+    """Check LLM connectivity (OpenAI-compatible /v1/chat/completions)"""
+    out: Dict[str, Any] = {"llm_ok": False}
+    try:
+        headers = {"Content-Type": "application/json"}
+        if settings.LLM_API_KEY:
+            headers["Authorization"] = f"Bearer {settings.LLM_API_KEY}"
+
+        # Minimal completion request
+        payload = {
+            "model": settings.LLM_MODEL,
+            "messages": [{"role": "user", "content": "Hello"}],
+            "max_tokens": 5,
+        }
+
+        # OpenAI and Ollama both serve the OpenAI-compatible /v1 path
+        base_url = str(settings.LLM_API_BASE).rstrip("/")
+        response = await client.post(
+            f"{base_url}/v1/chat/completions",
+            json=payload,
+            headers=headers,
+            timeout=LLM_PROBE_TIMEOUT,
+        )
+        out["llm_ok"] = response.status_code == 200
+
+        if out["llm_ok"]:
+            # Try to parse usage info for cost estimation (OpenAI format)
+            try:
+                resp_data = response.json()
+                if "usage" in resp_data:
+                    out["llm_usage"] = resp_data["usage"]
+            except Exception:
+                logging.warning("Unhandled exception occurred")
+        else:
+            out["llm_error"] = f"Status {response.status_code}: {response.text[:200]}"
+    except Exception as e:
+        out["llm_error"] = str(e)
+    return out
+
+
 @router.get("/state")
-def state():
+async def state(request: Request):
     """Debug endpoint to verify current API configuration and connectivity"""
     debug_enabled()  # Check if debug mode is enabled
     out = {
@@ -23,72 +90,13 @@ def state():
         "data_dir": settings.DATA_DIR,
         "elevenlabs_enabled": bool(settings.ELEVENLABS_API_KEY),
         "did_enabled": bool(settings.DID_API_KEY),
-        "collections": [],
-        "chroma_ok": False,
-        "llm_ok": False,
     }
 
-    # Test ChromaDB connectivity
-    try:
-        # Extract host and port from CHROMA_URL
-        chroma_url = str(settings.CHROMA_URL).rstrip("/")
-
-        # Try to connect to ChromaDB via HTTP client
-        import httpx
-
-        with httpx.Client(timeout=5.0) as client:
-            response = client.get(f"{chroma_url}/api/v1/collections")
-            if response.status_code == 200:
-                collections_data = response.json()
-                out["collections"] = (
-                    [col["name"] for col in collections_data]
-                    if isinstance(collections_data, list)
-                    else []
-                )
-                out["chroma_ok"] = True
-    except Exception as e:
-        out["chroma_error"] = str(e)
-
-    # Test LLM connectivity (OpenAI-compatible)
-    try:
-        with httpx.Client(timeout=10.0) as client:
-            headers = {"Content-Type": "application/json"}
-            if settings.LLM_API_KEY:
-                headers["Authorization"] = f"Bearer {settings.LLM_API_KEY}"
-
-            # Minimal completion request
-            payload = {
-                "model": settings.LLM_MODEL,
-                "messages": [{"role": "user", "content": "Hello"}],
-                "max_tokens": 5,
-            }
-
-            # Build URL (handle both Ollama and OpenAI formats)
-            base_url = str(settings.LLM_API_BASE).rstrip("/")
-            if settings.LLM_PROVIDER == "openai" or "openai.com" in base_url:
-                llm_url = f"{base_url}/v1/chat/completions"
-            else:
-                llm_url = f"{base_url}/v1/chat/completions"  # Ollama also uses /v1
-
-            response = client.post(llm_url, json=payload, headers=headers)
-            out["llm_ok"] = response.status_code == 200
-
-            if out["llm_ok"]:
-                # Try to parse usage info for cost estimation (OpenAI format)
-                try:
-                    resp_data = response.json()
-                    if "usage" in resp_data:
-                        out["llm_usage"] = resp_data["usage"]
-                except Exception:
-                    import logging
-
-                    logging.warning("Unhandled exception occurred")
-            else:
-                out["llm_error"] = (
-                    f"Status {response.status_code}: {response.text[:200]}"
-                )
-
-    except Exception as e:
-        out["llm_error"] = str(e)
-
+    # Probe ChromaDB and the LLM concurrently on the shared pooled client
+    client = request.app.state.http
+    chroma_result, llm_result = await asyncio.gather(
+        _probe_chroma(client), _probe_llm(client)
+    )
+    out.update(chroma_result)
+    out.update(llm_result)
     return out
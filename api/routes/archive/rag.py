@@ -4,19 +4,37 @@ Handles knowledge base updates with zero-downtime deployments
 """
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import Iterator, List, Optional, Dict, Any
+from cachetools import TTLCache
+import asyncio
+import itertools
 import logging
-import glob
+import mmap
+import operator
+import os
 from pathlib import Path
 
 from engines.rag_engine import Doc, get_rag_engine
 from settings import DATA_DIR
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 logger = logging.getLogger(__name__)
 
 
+# Collection sizes only change on ingest/swap/delete, so repeated page loads
+# that list every version reuse counts for a few seconds; writes invalidate
+_collection_counts = TTLCache(maxsize=128, ttl=5)
+
+
+def _collection_count(collection) -> int:
+    count = _collection_counts.get(collection.name)
+    if count is None:
+        count = _collection_counts[collection.name] = collection.count()
+    return count
+
+
 class VersionInfo(BaseModel):
     version_id: str
     collection_name: str
@@ -29,6 +47,9 @@ class IngestRequest(BaseModel):
         None, description="Target version, creates new if not provided"
     )
     source_path: str = Field(description="Path to knowledge files relative to DATA_DIR")
+    batch_size: int = Field(
+        100, ge=1, le=1000, description="Documents read and embedded per batch"
+    )
 
 
 class SwapRequest(BaseModel):
@@ -40,36 +61,48 @@ async def list_versions() -> List[VersionInfo]:
     """List all available RAG index versions"""
     try:
         rag = get_rag_engine()
-        collections = rag.client.list_collections()
-
-        versions = []
-        for collection in collections:
-            if collection.name.startswith(f"{rag.namespace}_v"):
-                try:
-                    doc_count = collection.count()
-                    version_id = collection.name.split(f"{rag.namespace}_")[1]
-
-                    versions.append(
-                        VersionInfo(
-                            version_id=version_id,
-                            collection_name=collection.name,
-                            document_count=doc_count,
-                            created_at="unknown",  # ChromaDB doesn't track creation time
-                        )
-                    )
-                except Exception as e:
-                    logger.warning(
-                        f"Error getting info for collection {collection.name}: {e}"
-                    )
-
-        # Sort by version number (extract numeric part)
-        def version_sort_key(v):
-            try:
-                return int(v.version_id.replace("v", ""))
-            except Exception:
-                return 0
-
-        versions.sort(key=version_sort_key, reverse=True)
+        prefix = f"{rag.namespace}_"
+        collections = await asyncio.to_thread(rag.client.list_collections)
+        candidates = [c for c in collections if c.name.startswith(f"{prefix}v")]
+
+        # One count() round-trip per uncached collection, issued concurrently;
+        # the TTLCache itself is only touched from the event loop
+        counts = [_collection_counts.get(c.name) for c in candidates]
+        misses = [i for i, count in enumerate(counts) if count is None]
+        fetched = await asyncio.gather(
+            *(asyncio.to_thread(candidates[i].count) for i in misses),
+            return_exceptions=True,
+        )
+        for i, count in zip(misses, fetched):
+            counts[i] = count
+            if not isinstance(count, Exception):
+                _collection_counts[candidates[i].name] = count
+
+        ranked = []
+        for collection, doc_count in zip(candidates, counts):
+            if isinstance(doc_count, Exception):
+                logger.warning(
+                    f"Error getting info for collection {collection.name}: {doc_count}"
+                )
+                continue
+            version_id = collection.name[len(prefix):]
+            # Numeric part of "v<N>" for sorting; non-numeric ids sort last
+            suffix = version_id[1:]
+            number = int(suffix) if suffix.isdigit() else 0
+            ranked.append(
+                (
+                    number,
+                    VersionInfo(
+                        version_id=version_id,
+                        collection_name=collection.name,
+                        document_count=doc_count,
+                        created_at="unknown",  # ChromaDB doesn't track creation time
+                    ),
+                )
+            )
+
+        ranked.sort(key=operator.itemgetter(0), reverse=True)
+        versions = [info for _, info in ranked]
         return versions
 
     except Exception as e:
@@ -87,7 +120,7 @@ async def get_active_version() -> Dict[str, Any]:
 
         return {
             "collection_name": rag.collection.name,
-            "document_count": rag.collection.count(),
+            "document_count": _collection_count(rag.collection),
             "namespace": rag.namespace,
             "status": "active",
         }
@@ -161,59 +194,42 @@ async def ingest_to_version(request: IngestRequest) -> Dict[str, Any]:
         except (ValueError, OSError):
             raise HTTPException(status_code=400, detail="Invalid source path")
 
-        docs = []
-        for file_path in glob.glob(str(source_path / "**/*.md"), recursive=True):
-            try:
-                # Additional security check for each file
-                file_path_resolved = Path(file_path).resolve()
-                if not file_path_resolved.is_relative_to(data_dir_resolved):
-                    continue  # Skip files outside DATA_DIR
-
-                # Double-check the file is within allowed directory and is a regular file
-                if (
-                    not file_path_resolved.is_file()
-                    or ".." in str(file_path_resolved)
-                    or not str(file_path_resolved).startswith(str(data_dir_resolved))
-                ):
-                    continue  # Skip potentially unsafe files
-
-                # Validate file extension for additional security
-                if not file_path_resolved.suffix.lower() == ".md":
-                    continue  # Only process markdown files
-
-                with open(file_path_resolved, "r", encoding="utf-8") as f:
-                    content = f.read()
-
-                # Create document ID from relative path
-                rel_path = Path(file_path).relative_to(DATA_DIR)
-                doc_id = str(rel_path).replace("/", "_").replace(".md", "")
-
-                docs.append(
-                    Doc(
-                        id=doc_id,
-                        text=content,
-                        source=str(rel_path),
-                        title=Path(file_path).stem,
-                        tags=(),
-                    )
-                )
+        # Directory walk, file reads and embedding are all blocking, so they
+        # run in worker threads; the walk is advanced one batch at a time,
+        # reads within a batch run concurrently and each batch is embedded
+        # and stored with one call
+        file_paths = _iter_markdown_files(source_path)
 
-            except Exception as e:
-                logger.warning(f"Error loading {file_path}: {e}")
+        total_docs = 0
+        ingested_count = 0
+        while batch_paths := await asyncio.to_thread(
+            list, itertools.islice(file_paths, request.batch_size)
+        ):
+            loaded = await asyncio.gather(
+                *(
+                    asyncio.to_thread(_load_markdown_doc, path, data_dir_resolved)
+                    for path in batch_paths
+                )
+            )
+            docs = [doc for doc in loaded if doc is not None]
+            if not docs:
+                continue
+            total_docs += len(docs)
+            ingested_count += await asyncio.to_thread(
+                rag.ingest_to_version, docs, collection_name
+            )
+        _collection_counts.pop(collection_name, None)
 
-        if not docs:
+        if not total_docs:
             raise HTTPException(
                 status_code=400, detail="No valid documents found in source path"
             )
 
-        # Ingest to version
-        ingested_count = rag.ingest_to_version(docs, collection_name)
-
         return {
             "version_id": version_id,
             "collection_name": collection_name,
             "documents_ingested": ingested_count,
-            "total_documents": len(docs),
+            "total_documents": total_docs,
             "source_path": request.source_path,
             "status": "ingested",
         }
@@ -227,6 +243,84 @@ async def ingest_to_version(request: IngestRequest) -> Dict[str, Any]:
         )
 
 
+# Directories never worth descending into during ingest
+INGEST_SKIP_DIRS = frozenset({".git", "node_modules", "__pycache__", ".venv"})
+
+
+def _iter_markdown_files(root: Path) -> Iterator[Path]:
+    """
+    Lazily yield *.md files under root, in sorted order per directory.
+    scandir reuses the dirent type, so no extra stat per entry, and
+    symlinked directories are not followed.
+    """
+    try:
+        with os.scandir(root) as it:
+            entries = sorted(it, key=operator.attrgetter("name"))
+    except OSError as e:
+        # Unreadable or not a directory: skip it, as rglob did
+        logger.warning(f"Skipping {root} during ingest: {e}")
+        return
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            if entry.name not in INGEST_SKIP_DIRS:
+                yield from _iter_markdown_files(Path(entry.path))
+        elif entry.name.endswith(".md"):
+            yield Path(entry.path)
+
+
+# Below this size a plain read() is cheaper than setting up a mapping
+MMAP_MIN_BYTES = 64 * 1024
+
+
+def _read_markdown(path: Path) -> str:
+    """Read UTF-8 text; large files decode straight from a read-only mapping"""
+    with open(path, "rb") as f:
+        if path.stat().st_size < MMAP_MIN_BYTES:
+            return f.read().decode("utf-8")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # str() decodes via the buffer protocol: no intermediate bytes copy
+            return str(mm, "utf-8")
+
+
+def _load_markdown_doc(file_path: Path, data_dir_resolved: Path) -> Optional[Doc]:
+    """Read one markdown file under DATA_DIR into a Doc (None if skipped)"""
+    try:
+        # Additional security check for each file
+        file_path_resolved = file_path.resolve()
+        if not file_path_resolved.is_relative_to(data_dir_resolved):
+            return None  # Skip files outside DATA_DIR
+
+        # Double-check the file is within allowed directory and is a regular file
+        if (
+            not file_path_resolved.is_file()
+            or ".." in str(file_path_resolved)
+            or not str(file_path_resolved).startswith(str(data_dir_resolved))
+        ):
+            return None  # Skip potentially unsafe files
+
+        # Validate file extension for additional security
+        if not file_path_resolved.suffix.lower() == ".md":
+            return None  # Only process markdown files
+
+        content = _read_markdown(file_path_resolved)
+
+        # Create document ID from relative path
+        rel_path = file_path.relative_to(DATA_DIR)
+        doc_id = str(rel_path).replace("/", "_").replace(".md", "")
+
+        return Doc(
+            id=doc_id,
+            text=content,
+            source=str(rel_path),
+            title=file_path.stem,
+            tags=(),
+        )
+
+    except Exception as e:
+        logger.warning(f"Error loading {file_path}: {e}")
+        return None
+
+
 @router.post("/swap")
 async def atomic_swap(request: SwapRequest) -> Dict[str, Any]:
     """Atomically swap to a new RAG index version"""
@@ -236,7 +330,7 @@ async def atomic_swap(request: SwapRequest) -> Dict[str, Any]:
 
         # Get info before swap
         old_collection = rag.collection.name
-        old_count = rag.collection.count()
+        old_count = _collection_count(rag.collection)
 
         # Perform atomic swap
         success = rag.atomic_swap(collection_name)
@@ -247,7 +341,8 @@ async def atomic_swap(request: SwapRequest) -> Dict[str, Any]:
                 detail=f"Failed to swap to version {request.target_version}",
             )
 
-        new_count = rag.collection.count()
+        _collection_counts.pop(collection_name, None)
+        new_count = _collection_count(rag.collection)
 
         return {
             "old_collection": old_collection,
@@ -282,6 +377,7 @@ async def delete_version(version_id: str) -> Dict[str, str]:
 
         try:
             rag.client.delete_collection(collection_name)
+            _collection_counts.pop(collection_name, None)
         except ValueError:
             raise HTTPException(
                 status_code=404, detail=f"Version {version_id} not found"
@@ -1,22 +1,46 @@
 # data-dev:api-uploads-route
 from fastapi import APIRouter, UploadFile, File, HTTPException
 from pydantic import BaseModel, AnyHttpUrl
+import anyio
 import settings
 import os
 import uuid
-import shutil
-import imghdr
 
 router = APIRouter(prefix="/api", tags=["uploads"])
 
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(25 * 1024 * 1024)))
+SNIFF_BYTES = 32
+
+
+def _image_kind(header: bytes):
+    """Magic-byte check for the accepted image types (replaces imghdr)"""
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if header.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if header[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "webp"
+    return None
+
 
 class UploadResponse(BaseModel):
     url: AnyHttpUrl
 
 
+_DATA_DIR_PREFIX = settings.DATA_DIR.rstrip(os.sep) + os.sep
+
+
 def _public_upload_url(local_path: str) -> str:
-    rel = os.path.relpath(local_path, settings.DATA_DIR).replace(os.path.sep, "/")
-    return f"{settings.PUBLIC_BASE_URL}/{rel}"
+    # Upload paths are built under DATA_DIR, so slicing off the prefix is
+    # enough; relpath only for anything else
+    if local_path.startswith(_DATA_DIR_PREFIX):
+        rel = local_path[len(_DATA_DIR_PREFIX):]
+    else:
+        rel = os.path.relpath(local_path, settings.DATA_DIR)
+    return f"{settings.PUBLIC_BASE_URL}/{rel.replace(os.sep, '/')}"
 
 
 @router.post("/upload/image", response_model=UploadResponse)
@@ -32,13 +56,24 @@ async def upload_image(file: UploadFile = File(...)):
     )[:100]
     out_path = os.path.join(out_dir, f"{uid}_{safe_name}")
 
-    with open(out_path, "wb") as f:
-        shutil.copyfileobj(file.file, f)
+    # quick content sniff, before anything touches the disk
+    header = await file.read(SNIFF_BYTES)
+    if _image_kind(header) is None:
+        raise HTTPException(status_code=400, detail="Unsupported image type")
+    await file.seek(0)
 
-    # quick content sniff
-    kind = imghdr.what(out_path)
-    if kind not in {"png", "jpeg", "gif", "webp"}:
+    # Stream in fixed-size chunks so peak memory stays at one chunk,
+    # and stop as soon as the upload exceeds the size cap. Writes go
+    # through anyio's threaded file so disk I/O never blocks the loop.
+    total = 0
+    async with await anyio.open_file(out_path, "wb") as f:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            total += len(chunk)
+            if total > MAX_UPLOAD_BYTES:
+                break
+            await f.write(chunk)
+    if total > MAX_UPLOAD_BYTES:
         os.remove(out_path)
-        raise HTTPException(status_code=400, detail="Unsupported image type")
+        raise HTTPException(status_code=413, detail="Upload too large")
 
     return {"url": _public_upload_url(out_path)}
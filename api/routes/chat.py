@@ -10,10 +10,21 @@ Security Features:
 - Audit logging with hashed IPs
 """
 
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional, Tuple
+from itertools import islice
+import asyncio
+import contextlib
+import hashlib
+import logging
+import os
+import re
+import time
 import uuid
+import msgpack
+import orjson
 
 # Import our clean modules (PYTHONPATH=/app is set in Dockerfile)
 from backend.settings import (
@@ -21,38 +32,37 @@ from backend.settings import (
     LLM_MODEL,
     RAG_NAMESPACE,
 )
-from backend.engines.rag_engine import RAGEngine
-from backend.engines.llm_interface import LLMEngine
+from backend.engines import rag_engine as rag_engine_module
+from backend.engines import llm_interface as llm_engine_module
+from backend.engines.session_store import get_answer_cache, get_session_store
 
 # Import security module (renamed to avoid conflicts with pip packages)
 from sheyla_security import SheylaSecurityGuard
-from sheyla_security.prompts import SHEYLA_SYSTEM_PROMPT, GROUNDING_INSTRUCTION, FALLBACK_RESPONSES
-from routes.validation import ValidationRequest, validate_response
-
-# Import Sheyla's conversation engine
-# import sys
-# from pathlib import Path
-#
-# sys.path.append(str(Path(__file__).parent.parent.parent))
-# from chat.engines.conversation_engine import ConversationEngine, ConversationContext
+from sheyla_security.prompts import (
+    SHEYLA_SYSTEM_PROMPT,
+    RAG_CONTEXT_TEMPLATE,
+    GROUNDING_INSTRUCTION,
+    FALLBACK_RESPONSES,
+)
+from routes.validation import _validate
 
-# Temporary placeholders until conversation engine is available
+# Per-session state persisted in the session store
 class ConversationContext:
-    def __init__(self, session_id=None, messages=None, **kwargs):
+    # Fixed attribute set: no per-instance __dict__
+    __slots__ = ("session_id", "messages", "user_focus", "mentioned_projects")
+
+    def __init__(self, session_id=None, messages=None, user_focus=None, mentioned_projects=None):
         self.session_id = session_id
         self.messages = messages or []
-        self.user_focus = kwargs.get('user_focus', [])
-        self.mentioned_projects = kwargs.get('mentioned_projects', [])
+        self.user_focus = user_focus or []
+        self.mentioned_projects = mentioned_projects or []
 
-class ConversationEngine:
-    def __init__(self):
-        pass
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
 
-    def generate_response(self, question=None, context=None, rag_results=None):
-        """Placeholder that raises exception to trigger fallback LLM response"""
-        raise NotImplementedError("Using fallback LLM response")
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 
 # Request/Response Models
@@ -65,7 +75,8 @@ class ChatRequest(BaseModel):
         RAG_NAMESPACE, description="RAG knowledge namespace"
     )
     include_citations: Optional[bool] = Field(
-        True, description="Include source citations"
+        True,
+        description="Include source citations (greetings/small talk never retrieve, so they have none)",
     )
 
 
@@ -89,37 +100,275 @@ class ChatResponse(BaseModel):
 
 
 # Initialize engines (lazy load to avoid startup crashes)
-rag_engine = None
-llm_engine = None
-conversation_engine = ConversationEngine()
-security_guard = SheylaSecurityGuard()
+# Engines are process-wide singletons owned by backend.engines, so the Chroma
+# client and LLM client are built once. A failed init is retried only after
+# ENGINE_RETRY_SECONDS instead of on every request.
+ENGINE_RETRY_SECONDS = 30
+_engine_retry_at = {"rag": 0.0, "llm": 0.0}
+
+
+def _init_engine(name: str, factory):
+    if time.monotonic() < _engine_retry_at[name]:
+        return None
+    try:
+        return factory()
+    except Exception as e:
+        logger.warning("%s engine initialization failed: %s", name.upper(), e)
+        _engine_retry_at[name] = time.monotonic() + ENGINE_RETRY_SECONDS
+        return None
+
 
 def get_rag_engine():
-    global rag_engine
-    if rag_engine is None:
-        try:
-            rag_engine = RAGEngine()
-        except Exception as e:
-            print(f"Warning: RAG engine initialization failed: {e}")
-            rag_engine = None
-    return rag_engine
+    return _init_engine("rag", rag_engine_module.get_rag_engine)
+
 
 def get_llm_engine():
-    global llm_engine
-    if llm_engine is None:
-        try:
-            llm_engine = LLMEngine()
-        except Exception as e:
-            print(f"Warning: LLM engine initialization failed: {e}")
-            llm_engine = None
-    return llm_engine
+    return _init_engine("llm", llm_engine_module.get_llm_engine)
+
+
+ENGINE_WARMUP_TIMEOUT = float(os.getenv("ENGINE_WARMUP_TIMEOUT", "30"))
+
+
+async def warm_up_engines() -> None:
+    """
+    Build the engine singletons at worker startup and run one throwaway
+    search, so the first chat doesn't pay for client setup, the first
+    embedding call and cold HNSW pages. Failures only log: the factories
+    aren't cached on error, so requests retry the lazy init as before.
+    """
+    try:
+        await asyncio.to_thread(llm_engine_module.get_llm_engine)
+    except Exception as e:
+        logger.warning("LLM engine warmup failed: %s", e)
+    try:
+        rag = await asyncio.to_thread(rag_engine_module.get_rag_engine)
+        await asyncio.wait_for(
+            rag.asearch("warmup", n_results=1), timeout=ENGINE_WARMUP_TIMEOUT
+        )
+        logger.info("RAG engine warmed up")
+    except Exception as e:
+        logger.warning("RAG engine warmup failed: %s", e)
+
+
+# Upstream LLM concurrency per worker: LLM_MAX_CONCURRENCY calls in flight,
+# up to LLM_MAX_QUEUE more waiting for a slot, and 503 beyond that so a
+# burst can't pile unbounded work (and RAG context) onto Ollama/Claude
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "64"))
+LLM_BUSY_RETRY_AFTER = "5"
+_llm_slots = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+_llm_load = {"in_flight": 0, "waiting": 0}
+
+
+def _llm_overloaded() -> bool:
+    return _llm_load["waiting"] >= LLM_MAX_QUEUE
+
+
+def _llm_busy_error() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Sheyla is handling a lot of conversations right now. Please try again shortly.",
+        headers={"Retry-After": LLM_BUSY_RETRY_AFTER},
+    )
+
+
+@contextlib.asynccontextmanager
+async def llm_slot():
+    """Hold one upstream LLM slot; raises 503 when the wait queue is full"""
+    if _llm_overloaded():
+        raise _llm_busy_error()
+    _llm_load["waiting"] += 1
+    try:
+        await _llm_slots.acquire()
+    finally:
+        _llm_load["waiting"] -= 1
+    _llm_load["in_flight"] += 1
+    try:
+        yield
+    finally:
+        _llm_load["in_flight"] -= 1
+        _llm_slots.release()
+
+
+def _check_llm_circuit(engine) -> None:
+    """
+    Fail fast before queueing for an LLM slot while the provider circuit is
+    open; half-open lets the call through so the engine can probe
+    """
+    if engine.breaker.state == "open":
+        raise llm_engine_module.LLMUnavailable("LLM provider circuit is open")
+
+
+def _client_ip(http_request: Request) -> str:
+    """Client IP, preferring the first X-Forwarded-For hop (behind proxies)"""
+    forwarded = http_request.headers.get("X-Forwarded-For")
+    if forwarded:
+        return forwarded.split(",", 1)[0].strip()
+    return http_request.client.host if http_request.client else "unknown"
+
+
+# The security guard is built per worker in the app lifespan (see main.py)
+# and read from app.state
+def get_security_guard(http_request: Request) -> SheylaSecurityGuard:
+    return http_request.app.state.security
+
+
+async def rate_limit_gate(
+    http_request: Request,
+    security_guard: SheylaSecurityGuard = Depends(get_security_guard),
+) -> str:
+    """
+    Per-IP rate limit as a route dependency, so rejected requests skip
+    body validation and the rest of the handler. Returns the client IP.
+    """
+    client_ip = _client_ip(http_request)
+    is_allowed, retry_after = security_guard.check_rate_limit(client_ip)
+    if not is_allowed:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Rate limited. Try again in {retry_after} seconds.",
+            headers={"Retry-After": str(retry_after)},
+        )
+    return client_ip
+
+
+# Conversation contexts live in Redis when REDIS_URL is set (shared across
+# workers, expired by TTL), otherwise in a per-process TTL store
+session_store = get_session_store()
+
+# Repeat questions with the same retrieved context produce the same prompt,
+# so answers are cached by a hash of the exact LLM input (None if disabled)
+answer_cache = get_answer_cache()
+
+
+def _answer_cache_key(messages: list) -> str:
+    """Content address of the LLM call: model, system prompt + RAG context, question"""
+    return hashlib.sha256(orjson.dumps([LLM_PROVIDER, LLM_MODEL, messages])).hexdigest()
+
+
+async def _cached_answer(key: str) -> Optional[str]:
+    if answer_cache is None:
+        return None
+    hit = await answer_cache.get(key)
+    return hit.get("answer") if hit else None
+
+
+async def _store_answer(key: str, answer: str) -> None:
+    if answer_cache is not None and answer:
+        await answer_cache.set(key, {"answer": answer})
+
+
+# Used instead of the LLM answer when grounding validation fails critically
+GROUNDED_FALLBACK_ANSWER = (
+    "I need to stay grounded in the information I have about Jimmie's work. "
+    "Could you ask me something more specific about his CBBP methodology, "
+    "the Anthra-SecLAB, his certifications, or his security engineering experience?"
+)
+
+
+# Small talk where retrieval adds nothing but an embedding + HNSW search
+_SMALL_TALK_RE = re.compile(
+    r"^\s*(?:hi|hiya|hello|hey|yo|thanks?|thank you|thx|ok(?:ay)?|cool|bye|goodbye)"
+    r"(?:\s+(?:there|sheyla|so much|again))?\W*$",
+    re.IGNORECASE,
+)
+MIN_RAG_QUERY_CHARS = 3
+
+
+def _skip_retrieval(message: str) -> bool:
+    return len(message.strip()) < MIN_RAG_QUERY_CHARS or bool(_SMALL_TALK_RE.match(message))
+
+
+async def _retrieve_rag_context(
+    message: str, include_citations: Optional[bool]
+) -> Tuple[List[str], List[Citation]]:
+    """Query the knowledge base; returns (context texts, citations)"""
+    rag_results = []
+    citations = []
+
+    # RAG enabled - embedding model pre-downloaded in init container (CPU/ONNX)
+    if not include_citations or _skip_retrieval(message):
+        return rag_results, citations
+    try:
+        # Query knowledge base with timeout to avoid hanging on embedding model download
+        engine = get_rag_engine()
+        if engine:
+            # Run search with 5 second timeout
+            try:
+                rag_docs = await asyncio.wait_for(
+                    engine.asearch(message, n_results=3),
+                    timeout=5.0
+                )
+            except asyncio.TimeoutError:
+                logger.warning("RAG search timed out - continuing without context")
+                rag_docs = []
+        else:
+            rag_docs = []
+
+        # rag_docs is a list of dicts with 'text', 'metadata', 'score'.
+        # Citations are built from our own data, so skip re-validation.
+        for doc in rag_docs:
+            text = doc.get("text") or ""
+            rag_results.append(text)
+            citations.append(
+                Citation.model_construct(
+                    text=text[:200] + "..." if len(text) > 200 else text,
+                    source=(doc.get("metadata") or {}).get("source", "Knowledge Base"),
+                    # Chroma returns cosine distance (0..2); clamp to the documented 0..1
+                    relevance_score=min(1.0, max(0.0, 1.0 - doc.get("score", 0.5))),
+                )
+            )
+    except Exception as e:
+        logger.warning("RAG retrieval error: %s", e)
+        # Continue without RAG if it fails
+    return rag_results, citations
+
+
+async def _fails_grounding(
+    response_text: str, question: str, citations: List[Citation]
+) -> bool:
+    """True when the answer fails hallucination/grounding validation badly"""
+    try:
+        validation_result = _validate(
+            response_text, question, [citation.source for citation in citations]
+        )
+    except Exception as e:
+        logger.warning("Validation error: %s", e)
+        # Continue without validation if it fails.
+        return False
+    return (
+        not validation_result.is_valid
+        and validation_result.confidence_score < 0.3
+    )
+
 
-# Store conversation contexts (in production, use Redis or database)
-conversation_store = {}
+def _build_llm_messages(message: str, rag_results: List[str]) -> list:
+    """Static hardened system prompt, plus a user turn carrying the RAG context"""
+    if rag_results:
+        context_section = "\n\n---\n".join(islice(rag_results, 3))
+    else:
+        context_section = "No relevant context was retrieved from the knowledge base."
+
+    # Per-turn content stays out of the system prompt so its cached prefix
+    # is reused across turns
+    return [
+        {"role": "system", "content": SHEYLA_SYSTEM_PROMPT},
+        {
+            "role": "user",
+            "content": (
+                f"{RAG_CONTEXT_TEMPLATE.format(rag_context=context_section)}\n\n"
+                f"{message}\n\n{GROUNDING_INSTRUCTION}"
+            ),
+        },
+    ]
 
 
 @router.post("/chat", response_model=ChatResponse)
-async def chat_with_sheyla(request: ChatRequest, http_request: Request):
+async def chat_with_sheyla(
+    request: ChatRequest,
+    client_ip: str = Depends(rate_limit_gate),
+    security_guard: SheylaSecurityGuard = Depends(get_security_guard),
+):
     """
     Main chat endpoint - handles conversation with Sheyla avatar
     Combines RAG retrieval, personality, and LLM generation
@@ -131,26 +380,18 @@ async def chat_with_sheyla(request: ChatRequest, http_request: Request):
     4. Output sanitization
     5. Audit logging
     """
-    # Get client IP (handle proxies)
-    client_ip = http_request.client.host if http_request.client else "unknown"
-    forwarded = http_request.headers.get("X-Forwarded-For")
-    if forwarded:
-        client_ip = forwarded.split(",")[0].strip()
-
     try:
-        # SECURITY: Validate and sanitize input
-        is_allowed, processed_input, block_reason = security_guard.process_request(
+        # SECURITY: Validate and sanitize input (rate limit already applied)
+        is_allowed, processed_input, block_reason = security_guard.screen_input(
             user_input=request.message,
             ip_address=client_ip
         )
 
         if not is_allowed:
             # Return appropriate error response
-            if block_reason == "rate_limit":
-                raise HTTPException(status_code=429, detail=processed_input)
-            elif block_reason == "injection":
+            if block_reason == "injection":
                 # Don't reveal injection detection, return friendly message
-                return ChatResponse(
+                return ChatResponse.model_construct(
                     answer=FALLBACK_RESPONSES["injection_blocked"],
                     citations=[],
                     model=f"{LLM_PROVIDER}/{LLM_MODEL}",
@@ -163,106 +404,39 @@ async def chat_with_sheyla(request: ChatRequest, http_request: Request):
 
         # Get or create conversation context
         session_id = request.session_id or str(uuid.uuid4())
-        if session_id not in conversation_store:
-            conversation_store[session_id] = ConversationContext(
-                session_id=session_id, messages=[]
-            )
-        context = conversation_store[session_id]
+        stored = await session_store.get(session_id)
+        if stored is None:
+            context = ConversationContext(session_id=session_id, messages=[])
+        else:
+            context = ConversationContext(**stored)
 
         # Step 1: Retrieve relevant context from RAG
-        rag_results = []
-        citations = []
-
-        # RAG enabled - embedding model pre-downloaded in init container (CPU/ONNX)
-        if request.include_citations:
-            try:
-                import asyncio
-                # Query knowledge base with timeout to avoid hanging on embedding model download
-                engine = get_rag_engine()
-                if engine:
-                    # Run search with 5 second timeout
-                    try:
-                        rag_docs = await asyncio.wait_for(
-                            asyncio.get_event_loop().run_in_executor(
-                                None, lambda: engine.search(request.message, n_results=3)
-                            ),
-                            timeout=5.0
-                        )
-                    except asyncio.TimeoutError:
-                        print("RAG search timed out - continuing without context")
-                        rag_docs = []
-                else:
-                    rag_docs = []
-
-                # rag_docs is a list of dicts with 'text', 'metadata', 'score'
-                rag_results = [doc.get("text", "") for doc in rag_docs]
-
-                # Create citations
-                citations = [
-                    Citation(
-                        text=(
-                            doc.get("text", "")[:200] + "..." if len(doc.get("text", "")) > 200 else doc.get("text", "")
-                        ),
-                        source=doc.get("metadata", {}).get("source", "Knowledge Base"),
-                        relevance_score=1.0 - doc.get("score", 0.5),  # ChromaDB uses distance, smaller is better
-                    )
-                    for doc in rag_docs
-                ]
-            except Exception as e:
-                print(f"RAG retrieval error: {e}")
-                # Continue without RAG if it fails
-
-        # Step 2: Generate response using Sheyla's conversation engine
-        # Use sanitized input from security guard
-        try:
-            # Use conversation engine for personality and context
-            response_text = conversation_engine.generate_response(
-                question=processed_input, context=context, rag_results=rag_results
-            )
-        except Exception as e:
-            print(f"Conversation engine error: {e}")
-            # Fallback to direct LLM call with sanitized input
-            response_text = await _fallback_llm_response(processed_input, rag_results)
-
-        # Step 3: Validate response for hallucinations and grounding
-        context_sources = [citation.source for citation in citations]
-        try:
-            validation_result = await validate_response(
-                ValidationRequest(
-                    response_text=response_text,
-                    question=request.message,
-                    context_sources=context_sources,
-                )
-            )
+        rag_results, citations = await _retrieve_rag_context(
+            request.message, request.include_citations
+        )
 
-            # If validation fails critically, use a safer fallback response.
-            if (
-                not validation_result.is_valid
-                and validation_result.confidence_score < 0.3
-            ):
-                response_text = (
-                    "I need to stay grounded in the information I have about Jimmie's work. "
-                    "Could you ask me something more specific about his CBBP methodology, "
-                    "the Anthra-SecLAB, his certifications, or his security engineering experience?"
-                )
+        # Step 2: Generate the answer with the LLM, using the sanitized input
+        response_text = await _llm_response(processed_input, rag_results)
 
-        except Exception as e:
-            print(f"Validation error: {e}")
-            # Continue without validation if it fails.
+        # Persist the context (also refreshes the session TTL)
+        await session_store.set(session_id, context.to_dict())
 
-        # Step 4: Get follow-up suggestions
-        # TODO: Implement get_follow_up_suggestions in ConversationEngine
-        follow_up_suggestions = []
+        # Step 3: Validate response for hallucinations and grounding.
+        # If validation fails critically, use a safer fallback response.
+        if await _fails_grounding(response_text, request.message, citations):
+            response_text = GROUNDED_FALLBACK_ANSWER
 
-        # Step 5: SECURITY - Sanitize output before sending
-        safe_response = security_guard.process_response(
+        # Step 4: SECURITY - Sanitize output before sending, and derive
+        # follow-up suggestions from the topics in the sanitized answer
+        safe_response, follow_up_suggestions = security_guard.process_response_full(
             response=response_text,
             ip_address=client_ip,
             user_input=processed_input
         )
 
-        # Step 6: Prepare response
-        return ChatResponse(
+        # Step 5: Prepare response (fields are produced internally, so skip
+        # re-validation; FastAPI still checks it against response_model)
+        return ChatResponse.model_construct(
             answer=safe_response,
             citations=citations,
             model=f"{LLM_PROVIDER}/{LLM_MODEL}",
@@ -275,14 +449,168 @@ async def chat_with_sheyla(request: ChatRequest, http_request: Request):
             },
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Chat error: {e}")
+        logger.exception("Chat error")
         raise HTTPException(status_code=500, detail=f"Chat processing failed: {str(e)}")
 
 
-async def _fallback_llm_response(message: str, rag_results: List[str]) -> str:
+# Streamed text is sanitized one completed sentence at a time. No
+# OutputSanitizer pattern matches across "<.!?><whitespace>", so each
+# sentence can be checked on its own before it is sent.
+_SENTENCE_END_RE = re.compile(r"[.!?]\s")
+
+
+def _split_complete(pending: str) -> Tuple[str, str]:
+    """Split buffered text into (complete sentences, unfinished tail)"""
+    end = 0
+    for match in _SENTENCE_END_RE.finditer(pending):
+        end = match.end()
+    return pending[:end], pending[end:]
+
+
+def _sse(payload: dict, event: Optional[str] = None) -> bytes:
+    """Encode one Server-Sent Event"""
+    data = b"data: " + orjson.dumps(payload) + b"\n\n"
+    if event:
+        return b"event: " + event.encode() + b"\n" + data
+    return data
+
+
+@router.post("/chat/stream")
+async def chat_stream(
+    request: ChatRequest,
+    client_ip: str = Depends(rate_limit_gate),
+    security_guard: SheylaSecurityGuard = Depends(get_security_guard),
+):
+    """
+    Streaming variant of /chat using Server-Sent Events.
+
+    Emits `data: {"delta": ...}` events as the LLM generates (each sentence
+    output-sanitized before it is sent), then a final `event: done` with the
+    sanitized full answer, citations, follow-ups and session_id. If grounding
+    validation fails critically, `done` carries `"replaced": true` and the
+    safe fallback answer, which clients should show instead.
+
+    Same security layers as /chat.
+    """
+    # SECURITY: Validate and sanitize input (rate limit already applied)
+    is_allowed, processed_input, block_reason = security_guard.screen_input(
+        user_input=request.message,
+        ip_address=client_ip
+    )
+    if not is_allowed and block_reason != "injection":
+        raise HTTPException(status_code=400, detail=processed_input)
+    # Shed load before the stream starts; once headers are sent a 503 is
+    # no longer possible
+    if is_allowed and _llm_overloaded():
+        raise _llm_busy_error()
+
+    session_id = request.session_id or str(uuid.uuid4())
+    model = f"{LLM_PROVIDER}/{LLM_MODEL}"
+
+    async def events() -> AsyncIterator[bytes]:
+        if not is_allowed:
+            # Don't reveal injection detection, return friendly message
+            answer = FALLBACK_RESPONSES["injection_blocked"]
+            yield _sse({"delta": answer})
+            yield _sse(
+                {
+                    "answer": answer,
+                    "replaced": False,
+                    "citations": [],
+                    "model": model,
+                    "session_id": session_id,
+                    "follow_up_suggestions": ["Tell me about Jimmie's experience", "What projects has Jimmie built?"],
+                },
+                event="done",
+            )
+            return
+
+        stored = await session_store.get(session_id)
+        if stored is None:
+            context = ConversationContext(session_id=session_id, messages=[])
+        else:
+            context = ConversationContext(**stored)
+
+        rag_results, citations = await _retrieve_rag_context(
+            request.message, request.include_citations
+        )
+
+        parts = []
+        pending = ""
+        messages = _build_llm_messages(processed_input, rag_results)
+        cache_key = _answer_cache_key(messages)
+        cached = await _cached_answer(cache_key)
+        if cached is not None:
+            # Served whole; the sanitized delta below is the entire answer
+            parts.append(cached)
+            pending = cached
+        else:
+            try:
+                engine = get_llm_engine()
+                if not engine:
+                    raise RuntimeError("LLM engine unavailable")
+                _check_llm_circuit(engine)
+                async with llm_slot():
+                    async for delta in engine.chat_completion_stream(
+                        messages, max_tokens=1024
+                    ):
+                        parts.append(delta)
+                        complete, pending = _split_complete(pending + delta)
+                        if complete:
+                            yield _sse({"delta": security_guard.output_sanitizer.sanitize(complete)})
+            except Exception as e:
+                if isinstance(e, llm_engine_module.LLMUnavailable):
+                    logger.warning("LLM circuit open; serving fallback")
+                else:
+                    logger.exception("Streaming LLM error")
+                if not parts:
+                    pending = FALLBACK_RESPONSES["technical_error"]
+                    parts.append(pending)
+            else:
+                # Only complete answers are cached
+                await _store_answer(cache_key, "".join(parts))
+        if pending:
+            yield _sse({"delta": security_guard.output_sanitizer.sanitize(pending)})
+
+        # One session write per turn, after the full answer is known
+        await session_store.set(session_id, context.to_dict())
+
+        response_text = "".join(parts)
+        replaced = await _fails_grounding(response_text, request.message, citations)
+        if replaced:
+            response_text = GROUNDED_FALLBACK_ANSWER
+
+        safe_response, follow_up_suggestions = security_guard.process_response_full(
+            response=response_text,
+            ip_address=client_ip,
+            user_input=processed_input
+        )
+        yield _sse(
+            {
+                "answer": safe_response,
+                "replaced": replaced,
+                "citations": [citation.model_dump() for citation in citations],
+                "model": model,
+                "session_id": session_id,
+                "follow_up_suggestions": follow_up_suggestions,
+            },
+            event="done",
+        )
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Stop proxies (nginx/Traefik) from buffering the event stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _llm_response(message: str, rag_results: List[str]) -> str:
     """
-    Fallback LLM response when conversation engine fails.
+    Generate Sheyla's answer.
     Uses hardened system prompt and RAG context to ground responses.
     """
     try:
@@ -291,56 +619,72 @@ async def _fallback_llm_response(message: str, rag_results: List[str]) -> str:
         if not engine:
             return FALLBACK_RESPONSES["technical_error"]
 
-        # Format RAG context for the hardened prompt
-        if rag_results:
-            context_section = "\n\n---\n".join(rag_results[:3])
-        else:
-            context_section = "No relevant context was retrieved from the knowledge base."
-
-        # Build the hardened system prompt with RAG context
-        system_prompt = SHEYLA_SYSTEM_PROMPT.format(
-            rag_context=context_section,
-            user_question=""  # Question goes in user message
-        )
-
-        # Prepare messages with hardened prompt
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": f"{message}\n\n{GROUNDING_INSTRUCTION}"},
-        ]
+        messages = _build_llm_messages(message, rag_results)
+        cache_key = _answer_cache_key(messages)
+        cached = await _cached_answer(cache_key)
+        if cached is not None:
+            return cached
 
+        _check_llm_circuit(engine)
         # Call LLM API with lower temperature for factual responses
-        response = await engine.chat_completion(messages, max_tokens=1024)
-        return response.get(
-            "content",
-            FALLBACK_RESPONSES["technical_error"],
-        )
-
-    except Exception as e:
-        print(f"Fallback LLM error: {e}")
+        async with llm_slot():
+            response = await engine.chat_completion(messages, max_tokens=1024)
+        content = response.get("content")
+        if not content:
+            return FALLBACK_RESPONSES["technical_error"]
+        # chat_completion reports failures as content with an "/error" model
+        if not response.get("model", "").endswith("/error"):
+            await _store_answer(cache_key, content)
+        return content
+
+    except HTTPException:
+        # 503 from llm_slot: let the client back off and retry
+        raise
+    except llm_engine_module.LLMUnavailable:
+        # Provider circuit is open: answer immediately instead of waiting out timeouts
+        logger.warning("LLM circuit open; serving fallback")
+        return FALLBACK_RESPONSES["technical_error"]
+    except Exception:
+        logger.exception("LLM error")
         return FALLBACK_RESPONSES["technical_error"]
 
 
-@router.get("/chat/sessions/{session_id}")
-async def get_conversation_history(session_id: str):
-    """Get conversation history for a session"""
-    if session_id not in conversation_store:
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+
+@router.get(
+    "/chat/sessions/{session_id}",
+    responses={200: {"content": {"application/json": {}, MSGPACK_MEDIA_TYPE: {}}}},
+)
+async def get_conversation_history(session_id: str, http_request: Request, response: Response):
+    """
+    Get conversation history for a session.
+    Send `Accept: application/msgpack` for a msgpack body instead of JSON.
+    """
+    stored = await session_store.get(session_id)
+    if stored is None:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    context = conversation_store[session_id]
-    return {
+    payload = {
         "session_id": session_id,
-        "messages": context.messages,
-        "user_focus": context.user_focus,
-        "mentioned_projects": context.mentioned_projects,
+        "messages": stored.get("messages", []),
+        "user_focus": stored.get("user_focus", []),
+        "mentioned_projects": stored.get("mentioned_projects", []),
     }
+    if MSGPACK_MEDIA_TYPE in http_request.headers.get("accept", ""):
+        return Response(
+            msgpack.packb(payload, use_bin_type=True),
+            media_type=MSGPACK_MEDIA_TYPE,
+            headers={"Vary": "Accept"},
+        )
+    response.headers["Vary"] = "Accept"
+    return payload
 
 
 @router.delete("/chat/sessions/{session_id}")
 async def clear_conversation(session_id: str):
     """Clear conversation history for a session"""
-    if session_id in conversation_store:
-        del conversation_store[session_id]
+    await session_store.delete(session_id)
     return {"message": "Conversation cleared"}
 
 
@@ -349,11 +693,12 @@ async def chat_health():
     """Health check for chat service including security status"""
     health = {
         "chat_service": "healthy",
-        "conversation_engine": "ready",
         "llm_provider": LLM_PROVIDER,
         "llm_model": LLM_MODEL,
         "rag_enabled": True,
-        "active_sessions": len(conversation_store),
+        "active_sessions": await session_store.count(),
+        "llm_in_flight": _llm_load["in_flight"],
+        "llm_waiting": _llm_load["waiting"],
         # Security features status
         "security": {
             "rate_limiting": "enabled (10 req/min)",
@@ -369,6 +714,7 @@ async def chat_health():
         engine = get_llm_engine()
         if engine:
             health["llm_status"] = "connected"
+            health["llm_circuit"] = engine.breaker.state
         else:
             health["llm_status"] = "initialization failed"
     except Exception as e:
@@ -390,12 +736,9 @@ async def chat_health():
 @router.get("/chat/rate-limit")
 async def get_rate_limit_status(http_request: Request):
     """Get rate limit status for current client"""
-    client_ip = http_request.client.host if http_request.client else "unknown"
-    forwarded = http_request.headers.get("X-Forwarded-For")
-    if forwarded:
-        client_ip = forwarded.split(",")[0].strip()
+    client_ip = _client_ip(http_request)
 
-    status = security_guard.get_rate_limit_status(client_ip)
+    status = get_security_guard(http_request).get_rate_limit_status(client_ip)
     return {
         "remaining_requests": status["remaining"],
         "limit": status["limit"],
@@ -403,32 +746,48 @@ async def get_rate_limit_status(http_request: Request):
     }
 
 
+# Static payload: encode once and let clients revalidate with If-None-Match
+QUICK_PROMPTS = {
+    "quick_prompts": [
+        "How does Jimmie approach securing a production application end to end?",
+        "What is the CBBP methodology and how does it work?",
+        "Tell me about the Anthra-SecLAB and what Jimmie validates there",
+        "What certifications does Jimmie hold and what is he studying for?",
+        "How is this portfolio site secured following NIST 800-53?",
+    ],
+    "categories": {
+        "projects": [
+            "Tell me about the Anthra-SecLAB",
+            "What is GP-Copilot and how does it work?",
+            "How does this portfolio site work technically?",
+        ],
+        "technical": [
+            "What technologies does Jimmie use?",
+            "How does the CBBP methodology work?",
+            "How is Sheyla secured following NIST AI 600-1?",
+        ],
+        "experience": [
+            "What is Jimmie's background in cybersecurity?",
+            "What NIST 800-53 controls has Jimmie implemented?",
+            "What is Jimmie's approach to vulnerability management?",
+        ],
+    },
+}
+_QUICK_PROMPTS_BYTES = orjson.dumps(QUICK_PROMPTS)
+# Every prompt the UI can send verbatim; pre-screened by the security guard
+QUICK_PROMPT_TEXTS = (
+    *QUICK_PROMPTS["quick_prompts"],
+    *(prompt for prompts in QUICK_PROMPTS["categories"].values() for prompt in prompts),
+)
+_QUICK_PROMPTS_ETAG = '"' + hashlib.sha256(_QUICK_PROMPTS_BYTES).hexdigest()[:16] + '"'
+
+
 @router.get("/chat/prompts")
-async def get_quick_prompts():
+async def get_quick_prompts(http_request: Request):
     """Get suggested conversation starters"""
-    return {
-        "quick_prompts": [
-            "How does Jimmie approach securing a production application end to end?",
-            "What is the CBBP methodology and how does it work?",
-            "Tell me about the Anthra-SecLAB and what Jimmie validates there",
-            "What certifications does Jimmie hold and what is he studying for?",
-            "How is this portfolio site secured following NIST 800-53?",
-        ],
-        "categories": {
-            "projects": [
-                "Tell me about the Anthra-SecLAB",
-                "What is GP-Copilot and how does it work?",
-                "How does this portfolio site work technically?",
-            ],
-            "technical": [
-                "What technologies does Jimmie use?",
-                "How does the CBBP methodology work?",
-                "How is Sheyla secured following NIST AI 600-1?",
-            ],
-            "experience": [
-                "What is Jimmie's background in cybersecurity?",
-                "What NIST 800-53 controls has Jimmie implemented?",
-                "What is Jimmie's approach to vulnerability management?",
-            ],
-        },
-    }
+    headers = {"ETag": _QUICK_PROMPTS_ETAG, "Cache-Control": "public, max-age=300"}
+    if http_request.headers.get("if-none-match") == _QUICK_PROMPTS_ETAG:
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content=_QUICK_PROMPTS_BYTES, media_type="application/json", headers=headers
+    )
@@ -3,17 +3,19 @@ Health endpoints for monitoring and debugging
 Provides system status, component health, and configuration info
 """
 
-from fastapi import APIRouter
-import sys
-from pathlib import Path
-sys.path.insert(0, str(Path(__file__).parent.parent.parent))
-from backend import settings
+from fastapi import APIRouter, Request
 import httpx
+
+# PYTHONPATH=/app is set in Dockerfile, so backend is importable as a package
+from backend import settings
 import os
 from datetime import datetime
 
 router = APIRouter(tags=["health"])
 
+# Built once and reused for every probe
+LLM_PROBE_TIMEOUT = httpx.Timeout(10.0, connect=2.0)
+
 
 @router.get("/health")
 def health_comprehensive():
@@ -47,7 +49,7 @@ def health_live():
 
 
 @router.get("/health/llm")
-async def health_llm():
+async def health_llm(request: Request):
     """Test LLM provider connectivity"""
     try:
         payload = {
@@ -60,20 +62,24 @@ async def health_llm():
         if hasattr(settings, "LLM_API_KEY") and settings.LLM_API_KEY:
             headers["Authorization"] = f"Bearer {settings.LLM_API_KEY}"
 
-        async with httpx.AsyncClient(
-            base_url=str(settings.LLM_API_BASE), timeout=15.0
-        ) as client:
-            r = await client.post("/v1/chat/completions", headers=headers, json=payload)
-            ok = r.status_code == 200
-            return {
-                "ok": ok,
-                "status_code": r.status_code,
-                "provider": settings.LLM_PROVIDER,
-                "model": settings.LLM_MODEL,
-                "latency_ms": (
-                    r.elapsed.total_seconds() * 1000 if hasattr(r, "elapsed") else None
-                ),
-            }
+        # Shared pooled client from the app lifespan (see main.py)
+        client = request.app.state.http
+        r = await client.post(
+            f"{str(settings.LLM_API_BASE).rstrip('/')}/v1/chat/completions",
+            headers=headers,
+            json=payload,
+            timeout=LLM_PROBE_TIMEOUT,
+        )
+        ok = r.status_code == 200
+        return {
+            "ok": ok,
+            "status_code": r.status_code,
+            "provider": settings.LLM_PROVIDER,
+            "model": settings.LLM_MODEL,
+            "latency_ms": (
+                r.elapsed.total_seconds() * 1000 if hasattr(r, "elapsed") else None
+            ),
+        }
     except Exception as e:
         return {
             "ok": False,
@@ -4,12 +4,17 @@ Real-time validation and safety mechanisms for chat responses
 """
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import ORJSONResponse, Response
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from cachetools import TTLCache
+import hashlib
 import logging
+import orjson
+import os
 import re
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 logger = logging.getLogger(__name__)
 
 
@@ -142,14 +147,82 @@ CONTEXT_VALIDATION_RULES = [
     },
 ]
 
+# Literal substrings (casefolded) that every match of a trap must contain.
+# A cheap `in` check against the casefolded text decides which traps need a
+# regex scan at all, so a clean response costs one pass per trigger instead of
+# eight backtracking scans. Keep in sync with the patterns above.
+_TRAP_TRIGGERS = {
+    "fabricated_facts": ("i recall", "i remember", "i know for certain", "definitely", "absolutely"),
+    "fake_companies": ("inc", "llc", "corp", "company", "ltd"),
+    "fabricated_numbers": ("$", "%", "customer", "client", "user"),
+    "wrong_avatar_identity": ("i am", "my name is", "i'm"),
+    "outdated_technology": ("currently using", "latest version", "new implementation"),
+    "unverified_locations": ("office", "location", "headquarter", "based"),
+    "fabricated_integrations": ("integrate",),
+    "vague_authority_claims": ("expert", "studies show", "research indicates", "it's well known"),
+}
 
-def detect_hallucination_patterns(text: str) -> List[Dict[str, Any]]:
+# re.IGNORECASE also matches dotless and dotted I (which casefolds to
+# 'i' + U+0307) as 'i'; fold those too so trigger gating never skips a match
+_TRIGGER_FOLD = str.maketrans({"\u0131": "i", "\u0307": None})
+
+# Compiled once at import; the HallucinationTrap models stay as-is for /traps
+_COMPILED_TRAPS = tuple(
+    (trap, re.compile(trap.pattern, re.IGNORECASE), _TRAP_TRIGGERS[trap.name])
+    for trap in HALLUCINATION_TRAPS
+)
+
+# Casefolded once at import so per-response checks never re-lower keywords
+_GROUNDING_KEYWORDS_CF = tuple(
+    tuple(keyword.casefold() for keyword in keywords)
+    for keywords in GROUNDING_KEYWORDS.values()
+)
+_CONTEXT_RULES_CF = tuple(
+    (
+        rule,
+        tuple(keyword.casefold() for keyword in rule["trigger_keywords"]),
+        tuple(ctx.casefold() for ctx in rule["required_context"]),
+        tuple((claim, claim.casefold()) for claim in rule["forbidden_claims"]),
+    )
+    for rule in CONTEXT_VALIDATION_RULES
+)
+
+
+# Validation is a pure function of its inputs, and cached or regenerated
+# answers repeat, so results are memoized by a digest of the request
+VALIDATION_CACHE_SIZE = int(os.getenv("VALIDATION_CACHE_SIZE", "4096"))
+VALIDATION_CACHE_TTL_SECONDS = int(os.getenv("VALIDATION_CACHE_TTL_SECONDS", "600"))
+_validation_cache = TTLCache(maxsize=VALIDATION_CACHE_SIZE, ttl=VALIDATION_CACHE_TTL_SECONDS)
+_validation_cache_stats = {"hits": 0, "misses": 0}
+
+
+def _validation_cache_key(
+    response_text: str, question: str, context_sources: List[str]
+) -> bytes:
+    digest = hashlib.blake2b(digest_size=16)
+    # Length-prefix every field so no two argument sets share a byte stream
+    # (e.g. question "a\0b" vs question "a" with source "b")
+    for field in (response_text, question, *context_sources):
+        data = field.encode()
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.digest()
+
+
+def detect_hallucination_patterns(
+    text: str, text_cf: Optional[str] = None
+) -> List[Dict[str, Any]]:
     """Detect potential hallucination patterns in response text"""
     detected_issues = []
 
-    for trap in HALLUCINATION_TRAPS:
-        matches = re.finditer(trap.pattern, text, re.IGNORECASE)
-        for match in matches:
+    if text_cf is None:
+        text_cf = text.casefold()
+    if not text_cf.isascii():
+        text_cf = text_cf.translate(_TRIGGER_FOLD)
+    for trap, compiled, triggers in _COMPILED_TRAPS:
+        if not any(trigger in text_cf for trigger in triggers):
+            continue
+        for match in compiled.finditer(text):
             detected_issues.append(
                 {
                     "trap_name": trap.name,
@@ -164,15 +237,18 @@ def detect_hallucination_patterns(text: str) -> List[Dict[str, Any]]:
     return detected_issues
 
 
-def calculate_grounding_score(text: str, context_sources: List[str]) -> float:
+def calculate_grounding_score(
+    text: str, context_sources: List[str], text_cf: Optional[str] = None
+) -> float:
     """Calculate how well-grounded the response is in known facts"""
-    text_lower = text.lower()
+    if text_cf is None:
+        text_cf = text.casefold()
     total_categories = len(GROUNDING_KEYWORDS)
-    matched_categories = 0
-
-    for category, keywords in GROUNDING_KEYWORDS.items():
-        if any(keyword.lower() in text_lower for keyword in keywords):
-            matched_categories += 1
+    matched_categories = sum(
+        1
+        for keywords in _GROUNDING_KEYWORDS_CF
+        if any(keyword in text_cf for keyword in keywords)
+    )
 
     # Base score from keyword matching
     base_score = matched_categories / total_categories
@@ -181,30 +257,31 @@ def calculate_grounding_score(text: str, context_sources: List[str]) -> float:
     context_bonus = min(len(context_sources) * 0.1, 0.3)
 
     # Penalty for very short responses (likely not grounded)
-    length_penalty = max(0, (100 - len(text)) / 200) if len(text) < 100 else 0
+    text_len = len(text)
+    length_penalty = (100 - text_len) / 200 if text_len < 100 else 0
 
     final_score = max(0, min(1, base_score + context_bonus - length_penalty))
     return final_score
 
 
-def validate_context_consistency(text: str, question: str) -> List[str]:
+def validate_context_consistency(
+    text: str, question: str, text_cf: Optional[str] = None
+) -> List[str]:
     """Validate response consistency with known context rules"""
     issues = []
-    text_lower = text.lower()
-    question_lower = question.lower()
+    if text_cf is None:
+        text_cf = text.casefold()
+    question_cf = question.casefold()
 
-    for rule in CONTEXT_VALIDATION_RULES:
+    for rule, triggers_cf, required_cf, forbidden_cf in _CONTEXT_RULES_CF:
         # Check if this rule applies to the question/response
         if any(
-            keyword in question_lower or keyword in text_lower
-            for keyword in rule["trigger_keywords"]
+            keyword in question_cf or keyword in text_cf for keyword in triggers_cf
         ):
 
             # Check required context is present
-            if rule["required_context"]:
-                has_required = any(
-                    ctx.lower() in text_lower for ctx in rule["required_context"]
-                )
+            if required_cf:
+                has_required = any(ctx in text_cf for ctx in required_cf)
                 if not has_required:
                     issues.append(
                         f"Missing required context for {rule['trigger_keywords']}: "
@@ -212,93 +289,111 @@ def validate_context_consistency(text: str, question: str) -> List[str]:
                     )
 
             # Check forbidden claims are absent
-            if rule["forbidden_claims"]:
-                for forbidden in rule["forbidden_claims"]:
+            if forbidden_cf:
+                for forbidden, forbidden_folded in forbidden_cf:
                     if forbidden == "*":
                         # This topic should not be discussed at all
                         issues.append(
                             f"Should not make claims about {rule['trigger_keywords']}"
                         )
-                    elif forbidden.lower() in text_lower:
+                    elif forbidden_folded in text_cf:
                         issues.append(f"Contains forbidden claim: '{forbidden}'")
 
     return issues
 
 
-@router.post("/validate", response_model=ValidationResult)
-async def validate_response(request: ValidationRequest) -> ValidationResult:
-    """Validate an AI response for hallucinations and grounding"""
-    try:
-        # Detect hallucination patterns
-        hallucination_issues = detect_hallucination_patterns(request.response_text)
+def _validate(
+    response_text: str, question: str, context_sources: List[str]
+) -> ValidationResult:
+    """Validation logic shared by the routes and chat (pure, no I/O)"""
+    cache_key = _validation_cache_key(response_text, question, context_sources)
+    cached = _validation_cache.get(cache_key)
+    if cached is not None:
+        _validation_cache_stats["hits"] += 1
+        return cached
+    _validation_cache_stats["misses"] += 1
 
-        # Calculate grounding score
-        grounding_score = calculate_grounding_score(
-            request.response_text, request.context_sources
-        )
+    # Casefold once and share it across the three checks
+    text_cf = response_text.casefold()
+
+    # Detect hallucination patterns
+    hallucination_issues = detect_hallucination_patterns(response_text, text_cf)
+
+    # Calculate grounding score
+    grounding_score = calculate_grounding_score(response_text, context_sources, text_cf)
+
+    # Validate context consistency
+    context_issues = validate_context_consistency(response_text, question, text_cf)
 
-        # Validate context consistency
-        context_issues = validate_context_consistency(
-            request.response_text, request.question
+    # Compile all issues
+    all_issues = []
+    safety_flags = []
+
+    # Process hallucination issues
+    for issue in hallucination_issues:
+        all_issues.append(
+            f"Hallucination: {issue['description']} - '{issue['matched_text']}'"
         )
+        if issue["severity"] in ["high", "critical"]:
+            safety_flags.append(f"{issue['severity']}: {issue['trap_name']}")
 
-        # Compile all issues
-        all_issues = []
-        safety_flags = []
+    # Add context issues
+    all_issues.extend(context_issues)
 
-        # Process hallucination issues
-        for issue in hallucination_issues:
-            all_issues.append(
-                f"Hallucination: {issue['description']} - '{issue['matched_text']}'"
-            )
-            if issue["severity"] in ["high", "critical"]:
-                safety_flags.append(f"{issue['severity']}: {issue['trap_name']}")
+    # Determine if anti-hallucination passed
+    critical_issues = [i for i in hallucination_issues if i["severity"] == "critical"]
+    high_issues = [i for i in hallucination_issues if i["severity"] == "high"]
 
-        # Add context issues
-        all_issues.extend(context_issues)
+    anti_hallucination_passed = len(critical_issues) == 0 and len(high_issues) <= 1
 
-        # Determine if anti-hallucination passed
-        critical_issues = [
-            i for i in hallucination_issues if i["severity"] == "critical"
-        ]
-        high_issues = [i for i in hallucination_issues if i["severity"] == "high"]
+    # Calculate overall confidence score
+    hallucination_penalty = len(hallucination_issues) * 0.1
+    context_penalty = len(context_issues) * 0.05
 
-        anti_hallucination_passed = len(critical_issues) == 0 and len(high_issues) <= 1
+    confidence_score = max(
+        0, min(1, grounding_score - hallucination_penalty - context_penalty)
+    )
 
-        # Calculate overall confidence score
-        hallucination_penalty = len(hallucination_issues) * 0.1
-        context_penalty = len(context_issues) * 0.05
+    # Overall validation
+    is_valid = (
+        anti_hallucination_passed
+        and grounding_score >= 0.4
+        and confidence_score >= 0.6
+        and len(critical_issues) == 0
+    )
 
-        confidence_score = max(
-            0, min(1, grounding_score - hallucination_penalty - context_penalty)
-        )
+    result = ValidationResult(
+        is_valid=is_valid,
+        confidence_score=confidence_score,
+        issues=all_issues,
+        safety_flags=safety_flags,
+        grounding_score=grounding_score,
+        anti_hallucination_passed=anti_hallucination_passed,
+    )
+    _validation_cache[cache_key] = result
+    return result
 
-        # Overall validation
-        is_valid = (
-            anti_hallucination_passed
-            and grounding_score >= 0.4
-            and confidence_score >= 0.6
-            and len(critical_issues) == 0
-        )
 
-        return ValidationResult(
-            is_valid=is_valid,
-            confidence_score=confidence_score,
-            issues=all_issues,
-            safety_flags=safety_flags,
-            grounding_score=grounding_score,
-            anti_hallucination_passed=anti_hallucination_passed,
+@router.post("/validate", response_model=ValidationResult)
+async def validate_response(request: ValidationRequest) -> ValidationResult:
+    """Validate an AI response for hallucinations and grounding"""
+    try:
+        return _validate(
+            request.response_text, request.question, request.context_sources
         )
-
     except Exception as e:
         logger.error(f"Error validating response: {e}")
         raise HTTPException(status_code=500, detail=f"Validation error: {str(e)}")
 
 
-@router.get("/traps")
-async def get_hallucination_traps() -> List[HallucinationTrap]:
+# The trap list never changes at runtime, so it is serialized once
+_TRAPS_JSON_BYTES = orjson.dumps([trap.model_dump() for trap in HALLUCINATION_TRAPS])
+
+
+@router.get("/traps", response_model=List[HallucinationTrap])
+async def get_hallucination_traps() -> Response:
     """Get all configured anti-hallucination traps"""
-    return HALLUCINATION_TRAPS
+    return Response(content=_TRAPS_JSON_BYTES, media_type="application/json")
 
 
 @router.post("/test-response")
@@ -307,11 +402,7 @@ async def test_response_safety(
 ) -> Dict[str, Any]:
     """Quick safety test for a response (for development/debugging)"""
     try:
-        validation_result = await validate_response(
-            ValidationRequest(
-                response_text=response_text, question=question, context_sources=[]
-            )
-        )
+        validation_result = _validate(response_text, question, [])
 
         return {
             "response_text": (
@@ -319,7 +410,7 @@ async def test_response_safety(
                 if len(response_text) > 200
                 else response_text
             ),
-            "validation": validation_result.dict(),
+            "validation": validation_result.model_dump(),
             "recommendation": (
                 "✅ SAFE TO USE"
                 if validation_result.is_valid
@@ -336,6 +427,20 @@ async def test_response_safety(
         raise HTTPException(status_code=500, detail=f"Test error: {str(e)}")
 
 
+def _validation_cache_info() -> Dict[str, Any]:
+    """Validation result cache size and hit rate, for the health check"""
+    hits = _validation_cache_stats["hits"]
+    lookups = hits + _validation_cache_stats["misses"]
+    return {
+        "size": len(_validation_cache),
+        "maxsize": _validation_cache.maxsize,
+        "ttl_seconds": VALIDATION_CACHE_TTL_SECONDS,
+        "hits": hits,
+        "misses": _validation_cache_stats["misses"],
+        "hit_rate": hits / lookups if lookups else 0.0,
+    }
+
+
 @router.get("/health")
 async def validation_health() -> Dict[str, Any]:
     """Health check for validation service"""
@@ -345,4 +450,5 @@ async def validation_health() -> Dict[str, Any]:
         "traps_loaded": len(HALLUCINATION_TRAPS),
         "grounding_categories": len(GROUNDING_KEYWORDS),
         "validation_rules": len(CONTEXT_VALIDATION_RULES),
+        "cache": _validation_cache_info(),
     }
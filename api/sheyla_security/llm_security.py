@@ -13,19 +13,60 @@ Author: Jimmie Coleman
 Created: 2026-01-06
 """
 
+import os
 import re
 import json
+import atexit
 import hashlib
+import functools
 import logging
+import threading
 from datetime import datetime, timedelta
-from typing import Optional, Tuple, List
+from typing import Dict, Iterable, Optional, Tuple, List
 from dataclasses import dataclass
 from pathlib import Path
 
+from .prompts import FOLLOW_UP_TOPICS, SUGGESTED_QUESTIONS
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
 
+# Optional linear-time regex engine for the injection/output scans.
+# SHEYLA_REGEX_ENGINE=re2 uses google-re2 when it is installed.
+SHEYLA_REGEX_ENGINE = os.getenv("SHEYLA_REGEX_ENGINE", "re").lower()
+
+
+@functools.lru_cache(maxsize=1)
+def _regex_engine():
+    """The re2 module when requested and importable, otherwise None"""
+    if SHEYLA_REGEX_ENGINE != "re2":
+        return None
+    try:
+        import re2
+    except ImportError:
+        logger.warning("SHEYLA_REGEX_ENGINE=re2 but google-re2 is not installed; using re")
+        return None
+    return re2
+
+
+def _compile_security_pattern(pattern: str):
+    """Compile a case-insensitive security pattern, with RE2 when enabled"""
+    re2 = _regex_engine()
+    if re2 is not None:
+        try:
+            return re2.compile('(?i)' + pattern)
+        except Exception as e:
+            logger.warning(f"RE2 cannot compile {pattern!r} ({e}); using re")
+    return re.compile(pattern, re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=4096)
+def hash_ip(ip: str) -> str:
+    """Privacy-preserving IP identifier for audit logs (memoized per IP)"""
+    return hashlib.sha256(ip.encode()).hexdigest()[:16]
+
+
 # ============================================================================
 # 1. PROMPT INJECTION DETECTION
 # ============================================================================
@@ -74,11 +115,55 @@ class PromptInjectionDetector:
         r'bypass\s+(safety|filter|restriction)',
     ]
 
+    # Literal substrings each pattern cannot match without, in the same order
+    # as INJECTION_PATTERNS. A pattern's regex only runs when one of its
+    # triggers is in the folded input, so benign messages skip most scans.
+    PATTERN_TRIGGERS = [
+        ('ignore',),
+        ('disregard',),
+        ('forget',),
+        ('override',),
+        ('you',),
+        ('pretend',),
+        ('act',),
+        ('roleplay',),
+        ('simulate',),
+        ('prompt', 'instruction'),
+        ('prompt', 'instruction'),
+        ('[end',),
+        ('system>',),
+        ('###',),
+        ('```',),
+        ('dan',),
+        ('jailbreak',),
+        ('developer',),
+        ('bypass',),
+    ]
+
+    _ALL_TRIGGERS = tuple(dict.fromkeys(t for ts in PATTERN_TRIGGERS for t in ts))
+
+    # re.IGNORECASE also matches dotless and dotted I (which casefolds to
+    # 'i' + U+0307) as 'i'; fold those too so the prefilter never misses
+    _TRIGGER_FOLD = str.maketrans({'\u0131': 'i', '\u0307': None})
+
+    # Delimiter characters stripped by sanitize(), removed in one pass
+    _DELIMITER_TRANS = str.maketrans('', '', '[]<>{}')
+
     def __init__(self):
         self.compiled_patterns = [
-            re.compile(pattern, re.IGNORECASE)
+            _compile_security_pattern(pattern)
             for pattern in self.INJECTION_PATTERNS
         ]
+        self._gated_patterns = list(
+            zip(self.compiled_patterns, self.PATTERN_TRIGGERS, strict=True)
+        )
+
+    def _present_triggers(self, user_input: str) -> set:
+        """Trigger substrings found in the case-folded input"""
+        folded = user_input.casefold()
+        if not folded.isascii():
+            folded = folded.translate(self._TRIGGER_FOLD)
+        return {trigger for trigger in self._ALL_TRIGGERS if trigger in folded}
 
     def detect(self, user_input: str) -> Tuple[bool, Optional[str]]:
         """
@@ -90,7 +175,13 @@ class PromptInjectionDetector:
         Returns:
             Tuple of (is_injection: bool, matched_pattern: Optional[str])
         """
-        for i, pattern in enumerate(self.compiled_patterns):
+        present = self._present_triggers(user_input)
+        if not present:
+            return False, None
+
+        for i, (pattern, triggers) in enumerate(self._gated_patterns):
+            if present.isdisjoint(triggers):
+                continue
             if pattern.search(user_input):
                 logger.warning(f"Prompt injection detected: pattern {i}")
                 return True, self.INJECTION_PATTERNS[i]
@@ -114,7 +205,7 @@ class PromptInjectionDetector:
             sanitized = pattern.sub('[FILTERED]', sanitized)
 
         # Remove potential delimiter attacks
-        sanitized = re.sub(r'[\[\]<>{}]', '', sanitized)
+        sanitized = sanitized.translate(self._DELIMITER_TRANS)
 
         return sanitized.strip()
 
@@ -137,6 +228,7 @@ class InputValidator:
 
     Enforces:
     - Length limits (1-1000 characters)
+    - Encoded-blob limit (long inputs made mostly of base64/hex runs)
     - Character sanitization (removes XSS vectors)
     - Whitespace normalization
     """
@@ -144,8 +236,17 @@ class InputValidator:
     MAX_LENGTH = 1000
     MIN_LENGTH = 1
 
+    # Inputs longer than this are rejected when more than MAX_ENCODED_SHARE
+    # of them sits in unbroken base64/hex-alphabet runs; checked in O(n)
+    # before any injection regex runs. The class is ASCII-only, so CJK and
+    # other scripts written without spaces are never counted.
+    DENSITY_CHECK_LENGTH = 256
+    MAX_ENCODED_SHARE = 0.5
+    _ENCODED_RUN = re.compile(r'[A-Za-z0-9+/=]{32,}')
+
     # Characters that could be used for XSS or template injection
-    DANGEROUS_CHARS = ['<', '>', '{', '}', '`', '$']
+    DANGEROUS_CHARS = frozenset('<>{}`$')
+    _DANGEROUS_TRANS = str.maketrans('', '', ''.join(DANGEROUS_CHARS))
 
     def validate(self, user_input: str) -> ValidationResult:
         """
@@ -171,11 +272,19 @@ class InputValidator:
         if len(user_input.strip()) < self.MIN_LENGTH:
             return ValidationResult(False, "Message too short")
 
+        if len(user_input) > self.DENSITY_CHECK_LENGTH and self._is_encoded_blob(user_input):
+            return ValidationResult(False, "Message format not supported")
+
         # Sanitize
         sanitized = self.sanitize(user_input)
 
         return ValidationResult(True, sanitized_input=sanitized)
 
+    def _is_encoded_blob(self, user_input: str) -> bool:
+        """True when most of the input is long base64/hex-style runs"""
+        encoded = sum(len(run) for run in self._ENCODED_RUN.findall(user_input))
+        return encoded > len(user_input) * self.MAX_ENCODED_SHARE
+
     def sanitize(self, user_input: str) -> str:
         """
         Sanitize input by removing dangerous characters.
@@ -186,16 +295,12 @@ class InputValidator:
         Returns:
             Sanitized input string
         """
-        sanitized = user_input.strip()
-
-        # Remove dangerous characters
-        for char in self.DANGEROUS_CHARS:
-            sanitized = sanitized.replace(char, '')
-
-        # Normalize whitespace
-        sanitized = ' '.join(sanitized.split())
-
-        return sanitized
+        # Remove dangerous characters (clean input, the common case, skips
+        # the translate pass), then normalize whitespace; split() also drops
+        # the leading/trailing whitespace
+        if any(char in user_input for char in self.DANGEROUS_CHARS):
+            user_input = user_input.translate(self._DANGEROUS_TRANS)
+        return ' '.join(user_input.split())
 
 
 # ============================================================================
@@ -231,7 +336,7 @@ class OutputSanitizer:
 
     def __init__(self):
         self.compiled_patterns = [
-            re.compile(pattern, re.IGNORECASE)
+            _compile_security_pattern(pattern)
             for pattern in self.FORBIDDEN_PATTERNS
         ]
 
@@ -245,12 +350,32 @@ class OutputSanitizer:
         Returns:
             Sanitized output with sensitive patterns redacted
         """
+        return self.sanitize_and_check(output)[0]
+
+    def sanitize_and_check(self, output: str) -> Tuple[str, bool, Optional[str]]:
+        """
+        Redact sensitive patterns and report the first offender in one pass.
+
+        Equivalent to sanitize() plus is_safe() on the raw output: until the
+        first pattern matches, every pattern runs against unmodified text.
+
+        Args:
+            output: Raw LLM output
+
+        Returns:
+            Tuple of (sanitized output, is_safe: bool, matched_pattern: Optional[str])
+        """
         sanitized = output
+        first_match = None
 
-        for pattern in self.compiled_patterns:
-            sanitized = pattern.sub('[REDACTED]', sanitized)
+        for i, pattern in enumerate(self.compiled_patterns):
+            sanitized, count = pattern.subn('[REDACTED]', sanitized)
+            if count and first_match is None:
+                first_match = i
 
-        return sanitized
+        if first_match is None:
+            return sanitized, True, None
+        return sanitized, False, self.FORBIDDEN_PATTERNS[first_match]
 
     def is_safe(self, output: str) -> Tuple[bool, Optional[str]]:
         """
@@ -363,8 +488,13 @@ class AuditLogger:
     - JSONL format for easy parsing
     - Input preview (truncated) for debugging
     - Block reason tracking
+    - Buffered writes, flushed by a background thread every 5 s or once
+      256 entries are pending; blocked requests are written immediately
     """
 
+    FLUSH_INTERVAL_SECONDS = 5.0
+    FLUSH_MAX_ENTRIES = 256
+
     def __init__(self, log_dir: Optional[str] = None):
         """
         Initialize audit logger.
@@ -380,6 +510,28 @@ class AuditLogger:
         self.log_dir.mkdir(parents=True, exist_ok=True)
         self.log_file = self.log_dir / f"sheyla_audit_{datetime.now().strftime('%Y%m%d')}.jsonl"
 
+        # Entries are buffered and appended in one write per batch instead of
+        # one open/write/close per request
+        self._buffer: List[str] = []
+        self._lock = threading.Lock()
+        # Drain on a timer so entries don't wait for the next request on a
+        # quiet pod; close() stops it and writes what's left at exit
+        self._stop = threading.Event()
+        self._flusher = threading.Thread(
+            target=self._flush_periodically, name="audit-log-flush", daemon=True
+        )
+        self._flusher.start()
+        atexit.register(self.close)
+
+    def _flush_periodically(self) -> None:
+        while not self._stop.wait(self.FLUSH_INTERVAL_SECONDS):
+            self.flush()
+
+    def close(self) -> None:
+        """Stop the background flusher and write any buffered entries."""
+        self._stop.set()
+        self.flush()
+
     def log(
         self,
         ip: str,
@@ -402,7 +554,7 @@ class AuditLogger:
         """
         entry = {
             "timestamp": datetime.now().isoformat(),
-            "ip_hash": hashlib.sha256(ip.encode()).hexdigest()[:16],  # Hash for privacy
+            "ip_hash": hash_ip(ip),  # Hash for privacy
             "input_length": len(user_input),
             "input_preview": user_input[:50] + "..." if len(user_input) > 50 else user_input,
             "response_length": response_length,
@@ -411,11 +563,25 @@ class AuditLogger:
             "block_reason": block_reason
         }
 
-        try:
-            with open(self.log_file, 'a') as f:
-                f.write(json.dumps(entry) + '\n')
-        except Exception as e:
-            logger.error(f"Failed to write audit log: {e}")
+        with self._lock:
+            self._buffer.append(json.dumps(entry) + '\n')
+            # Blocked requests are the entries an investigation needs; don't
+            # leave them in memory where a SIGKILL/OOM would lose them
+            due = blocked or len(self._buffer) >= self.FLUSH_MAX_ENTRIES
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        """Append all buffered entries to the log file in a single write."""
+        with self._lock:
+            pending, self._buffer = self._buffer, []
+            if not pending:
+                return
+            try:
+                with open(self.log_file, 'a') as f:
+                    f.write(''.join(pending))
+            except Exception as e:
+                logger.error(f"Failed to write audit log ({len(pending)} entries): {e}")
 
     def get_recent_logs(self, limit: int = 100) -> List[dict]:
         """
@@ -428,6 +594,7 @@ class AuditLogger:
             List of log entries (most recent first)
         """
         entries = []
+        self.flush()
 
         try:
             if self.log_file.exists():
@@ -478,12 +645,14 @@ class SheylaSecurityGuard:
         )
     """
 
-    def __init__(self, log_dir: Optional[str] = None):
+    def __init__(self, log_dir: Optional[str] = None, trusted_prompts: Iterable[str] = ()):
         """
         Initialize security guard with all components.
 
         Args:
             log_dir: Directory for audit logs
+            trusted_prompts: Canned prompts offered by the UI, in addition
+                to SUGGESTED_QUESTIONS (see screen_input)
         """
         self.injection_detector = PromptInjectionDetector()
         self.input_validator = InputValidator()
@@ -491,6 +660,39 @@ class SheylaSecurityGuard:
         self.rate_limiter = RateLimiter(max_requests=10, window_seconds=60)
         self.audit_logger = AuditLogger(log_dir=log_dir)
 
+        # Canned prompt -> its screened form, computed once here. Only prompts
+        # that pass the full screen are listed, so an exact match can skip it
+        # with the same result.
+        self.trusted_inputs: Dict[str, str] = {}
+        for prompt in (*SUGGESTED_QUESTIONS, *trusted_prompts):
+            validation = self.input_validator.validate(prompt)
+            if validation.is_valid and not self.injection_detector.detect(validation.sanitized_input)[0]:
+                self.trusted_inputs[prompt] = validation.sanitized_input
+
+    def check_rate_limit(self, ip_address: str, user_input: str = "") -> Tuple[bool, int]:
+        """
+        Apply the per-IP rate limit, audit-logging rejected requests.
+
+        Cheap enough to run before the request body is validated.
+
+        Args:
+            ip_address: Client IP address
+            user_input: Raw user input, if already available (for logging)
+
+        Returns:
+            Tuple of (is_allowed: bool, seconds_until_reset: int)
+        """
+        is_allowed, retry_after = self.rate_limiter.is_allowed(ip_address)
+        if not is_allowed:
+            self.audit_logger.log(
+                ip=ip_address,
+                user_input=user_input[:100],
+                response_length=0,
+                blocked=True,
+                block_reason="rate_limit"
+            )
+        return is_allowed, retry_after
+
     def process_request(
         self,
         user_input: str,
@@ -512,18 +714,36 @@ class SheylaSecurityGuard:
             Tuple of (is_allowed, processed_input_or_error, block_reason)
         """
         # 1. Rate limiting
-        is_allowed, retry_after = self.rate_limiter.is_allowed(ip_address)
+        is_allowed, retry_after = self.check_rate_limit(ip_address, user_input)
         if not is_allowed:
-            self.audit_logger.log(
-                ip=ip_address,
-                user_input=user_input[:100],
-                response_length=0,
-                blocked=True,
-                block_reason="rate_limit"
-            )
             return False, f"Rate limited. Try again in {retry_after} seconds.", "rate_limit"
 
-        # 2. Input validation
+        return self.screen_input(user_input, ip_address)
+
+    def screen_input(
+        self,
+        user_input: str,
+        ip_address: str
+    ) -> Tuple[bool, str, Optional[str]]:
+        """
+        Validate input and check for prompt injection (no rate limiting).
+
+        Use after check_rate_limit() when the rate limit is enforced
+        separately, e.g. as a route dependency.
+
+        Args:
+            user_input: Raw user input
+            ip_address: Client IP address
+
+        Returns:
+            Tuple of (is_allowed, processed_input_or_error, block_reason)
+        """
+        # Suggestion clicks: exact matches were screened at startup
+        trusted = self.trusted_inputs.get(user_input)
+        if trusted is not None:
+            return True, trusted, None
+
+        # 1. Input validation
         validation = self.input_validator.validate(user_input)
         if not validation.is_valid:
             self.audit_logger.log(
@@ -535,7 +755,7 @@ class SheylaSecurityGuard:
             )
             return False, validation.error, "validation"
 
-        # 3. Prompt injection detection
+        # 2. Prompt injection detection
         is_injection, pattern = self.injection_detector.detect(validation.sanitized_input)
         if is_injection:
             self.audit_logger.log(
@@ -551,6 +771,57 @@ class SheylaSecurityGuard:
         # All checks passed
         return True, validation.sanitized_input, None
 
+    # One alternation over all topic keywords, so follow-up extraction is a
+    # single scan of the sanitized response
+    FOLLOW_UP_MAX = 3
+    _follow_up_re = re.compile(
+        r'(?<![\w+-])(' + '|'.join(
+            re.escape(topic)
+            for topic in sorted(FOLLOW_UP_TOPICS, key=len, reverse=True)
+        ) + r')(?![\w+-])',
+        re.IGNORECASE
+    )
+    _follow_up_by_topic = {topic.casefold(): q for topic, q in FOLLOW_UP_TOPICS.items()}
+
+    def process_response_full(
+        self,
+        response: str,
+        ip_address: str,
+        user_input: str,
+        tokens_used: int = 0
+    ) -> Tuple[str, List[str]]:
+        """
+        Sanitize and log outgoing response, and suggest follow-ups.
+
+        Follow-up questions come from the topics mentioned in the
+        sanitized response (see prompts.FOLLOW_UP_TOPICS).
+
+        Args:
+            response: Raw LLM response
+            ip_address: Client IP address
+            user_input: Original user input (for logging)
+            tokens_used: LLM tokens consumed
+
+        Returns:
+            Tuple of (sanitized response, follow-up suggestions)
+        """
+        safe_response = self.process_response(
+            response=response,
+            ip_address=ip_address,
+            user_input=user_input,
+            tokens_used=tokens_used
+        )
+
+        follow_ups: List[str] = []
+        for match in self._follow_up_re.finditer(safe_response):
+            question = self._follow_up_by_topic[match.group(1).casefold()]
+            if question not in follow_ups:
+                follow_ups.append(question)
+                if len(follow_ups) >= self.FOLLOW_UP_MAX:
+                    break
+
+        return safe_response, follow_ups
+
     def process_response(
         self,
         response: str,
@@ -571,7 +842,9 @@ class SheylaSecurityGuard:
             Sanitized response safe for client
         """
         # Sanitize output
-        safe_response = self.output_sanitizer.sanitize(response)
+        safe_response, is_safe, pattern = self.output_sanitizer.sanitize_and_check(response)
+        if not is_safe:
+            logger.warning(f"Redacted sensitive output: {pattern[:50]}")
 
         # Log successful interaction
         self.audit_logger.log(
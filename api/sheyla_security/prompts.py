@@ -7,7 +7,7 @@ Created: 2026-01-06
 """
 
 # ============================================================================
-# HARDENED SYSTEM PROMPT
+# HARDENED SYSTEM PROMPT (static; see RAG_CONTEXT_TEMPLATE)
 # ============================================================================
 
 SHEYLA_SYSTEM_PROMPT = """You are Sheyla, an AI assistant on Jimmie Coleman's portfolio website. Your purpose is to answer questions about Jimmie's professional experience, skills, projects, and qualifications.
@@ -99,20 +99,23 @@ How Jimmie uses Checkov:
 
 ---
 
-Below is verified information about Jimmie from the portfolio knowledge base:
-
-{rag_context}
-
----
-
 ## RESPONSE STRATEGY
 
-1. If the question is about HOW Jimmie uses something in THIS project, prioritize the RAG context above
+1. If the question is about HOW Jimmie uses something in THIS project, prioritize the RAG context sent with the question
 2. If the question is about WHAT a tool or concept IS in general, you may use your training knowledge
 3. If both apply, combine them: explain the general concept briefly, then focus on how Jimmie specifically implements it
 4. If the RAG context has specific details, those take priority over general knowledge
 5. If asked about project-specific details not in the context, say you don't have that information"""
 
+# Retrieved context is sent in the user turn, not the system prompt, so the
+# system prompt stays byte-identical across turns and its prefix can be
+# served from the provider's prompt cache
+RAG_CONTEXT_TEMPLATE = """Below is verified information about Jimmie from the portfolio knowledge base:
+
+{rag_context}
+
+---"""
+
 
 # ============================================================================
 # FALLBACK RESPONSES
@@ -146,6 +149,20 @@ SUGGESTED_QUESTIONS = [
     "Tell me about the JSA security agents",
 ]
 
+# Topic keyword (as it appears in a response) -> follow-up question.
+# Order matters: suggestions are offered in order of first mention.
+FOLLOW_UP_TOPICS = {
+    "CBBP": "How does the CBBP methodology work?",
+    "Anthra-SecLAB": "What does Jimmie validate in the Anthra-SecLAB?",
+    "GP-Copilot": "What is GP-Copilot and how does it work?",
+    "NIST": "What NIST 800-53 controls has Jimmie implemented?",
+    "Kubernetes": "What's Jimmie's experience with Kubernetes?",
+    "CKA": "What certifications does Jimmie have?",
+    "Security+": "What certifications does Jimmie have?",
+    "RAG": "How does this portfolio's RAG pipeline work?",
+    "JADE": "How does JADE AI work?",
+}
+
 
 # ============================================================================
 # GROUNDING INSTRUCTIONS (appended to user queries)
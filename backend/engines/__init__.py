@@ -1 +1,10 @@
 # Engine modules
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Dedicated pool for blocking RAG work (embeddings + Chroma queries), kept
+# apart from the default executor Starlette uses for sync routes/file I/O
+RAG_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv("RAG_EXECUTOR_WORKERS", "16")),
+    thread_name_prefix="rag",
+)
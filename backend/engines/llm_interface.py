@@ -1,25 +1,103 @@
+import functools
 import os
 import logging
+import time
 from typing import AsyncGenerator
-from pathlib import Path
+
+from backend.settings import read_secret
 
 logger = logging.getLogger(__name__)
 
+# Bounded Claude calls: the SDK default is a 600s timeout, which lets a
+# flapping provider hold an LLM slot and a chat turn for ten minutes
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+# Consecutive provider failures before calls short-circuit, and for how long
+LLM_BREAKER_THRESHOLD = int(os.getenv("LLM_BREAKER_THRESHOLD", "5"))
+LLM_BREAKER_COOLDOWN = float(os.getenv("LLM_BREAKER_COOLDOWN", "30"))
+
+
+class LLMUnavailable(RuntimeError):
+    """Raised instead of calling the provider while the circuit is open"""
+
 
-def read_secret(name: str) -> str:
-    """Read a secret from NAME or NAME_FILE without logging the value."""
-    value = os.getenv(name)
-    if value:
-        return value
+def _is_provider_failure(exc: BaseException) -> bool:
+    """Timeouts, connection errors and 5xx count; 4xx are our own fault"""
+    from anthropic import APIConnectionError, APIStatusError
 
-    secret_file = os.getenv(f"{name}_FILE")
-    if not secret_file:
-        return ""
+    if isinstance(exc, APIConnectionError):  # includes APITimeoutError
+        return True
+    return isinstance(exc, APIStatusError) and exc.status_code >= 500
 
-    try:
-        return Path(secret_file).read_text(encoding="utf-8").strip()
-    except OSError:
-        return ""
+
+class CircuitBreaker:
+    """
+    Process-wide breaker: opens after `threshold` consecutive failures and
+    fails fast for `cooldown` seconds, then lets one trial call through
+    (half-open) whose outcome closes or re-opens it
+    """
+
+    def __init__(self, threshold: int = LLM_BREAKER_THRESHOLD, cooldown: float = LLM_BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.cooldown:
+            return "open"
+        return "half-open"
+
+    def before_call(self) -> None:
+        state = self.state
+        if state == "open":
+            raise LLMUnavailable("LLM provider circuit is open")
+        if state == "half-open":
+            # Re-arm the window so only this caller probes the provider
+            self.opened_at = time.monotonic()
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self, exc: BaseException) -> None:
+        if not _is_provider_failure(exc):
+            return
+        self.failures += 1
+        if self.failures >= self.threshold:
+            if self.opened_at is None:
+                logger.warning(
+                    f"LLM circuit open after {self.failures} consecutive failures; "
+                    f"failing fast for {self.cooldown:.0f}s"
+                )
+            self.opened_at = time.monotonic()
+
+
+def _split_system_message(messages: list):
+    """Split OpenAI-style messages into (system prompt, remaining messages)"""
+    system_message = None
+    api_messages = []
+    for msg in messages:
+        if msg["role"] == "system":
+            system_message = msg["content"]
+        else:
+            api_messages.append(msg)
+    return system_message, api_messages
+
+
+def _cached_system(system_message):
+    """
+    Claude system blocks with the prompt marked cacheable: it is identical on
+    every turn, so Anthropic serves its prefill from the prompt cache
+    """
+    if not system_message:
+        return None
+    return [
+        {"type": "text", "text": system_message, "cache_control": {"type": "ephemeral"}}
+    ]
 
 
 class LLMEngine:
@@ -46,6 +124,18 @@ class LLMEngine:
             logger.info(f"Using Claude provider with model: {self.claude_model}")
         else:
             raise ValueError(f"Unknown LLM provider: {self.provider}. Use 'claude' or 'local'")
+        self.breaker = CircuitBreaker()
+
+    @functools.cached_property
+    def claude_client(self):
+        """One AsyncAnthropic (and httpx pool) per engine instead of per call"""
+        from anthropic import AsyncAnthropic
+
+        return AsyncAnthropic(
+            api_key=self.claude_api_key,
+            timeout=LLM_TIMEOUT_SECONDS,
+            max_retries=LLM_MAX_RETRIES,
+        )
 
     def _load_local_model(self):
         """Load local transformers model (lazy import dependencies)"""
@@ -89,13 +179,9 @@ class LLMEngine:
     async def _generate_claude(self, prompt: str, max_tokens: int) -> AsyncGenerator[str, None]:
         """Generate using Claude (Anthropic) API with streaming"""
         try:
-            from anthropic import AsyncAnthropic
-
-            client = AsyncAnthropic(api_key=self.claude_api_key)
-
             logger.info(f"Calling Claude API with model: {self.claude_model}")
 
-            async with client.messages.stream(
+            async with self.claude_client.messages.stream(
                 model=self.claude_model,
                 max_tokens=max_tokens,
                 temperature=0.7,
@@ -156,6 +242,7 @@ class LLMEngine:
         messages: list of {"role": "system"|"user"|"assistant", "content": str}
         temperature: lower values (0.1-0.4) for factual RAG responses, higher (0.7+) for creative
         Returns: {"content": str, "model": str}
+        Raises LLMUnavailable while the provider circuit is open
         """
         try:
             if self.provider == "claude":
@@ -164,6 +251,8 @@ class LLMEngine:
                 return await self._chat_completion_local(messages, max_tokens, temperature)
             else:
                 raise ValueError(f"Unsupported provider: {self.provider}")
+        except LLMUnavailable:
+            raise
         except Exception as e:
             logger.error(f"Chat completion error: {e}", exc_info=True)
             return {
@@ -171,38 +260,66 @@ class LLMEngine:
                 "model": f"{self.provider}/error",
             }
 
+    async def chat_completion_stream(
+        self, messages: list, max_tokens: int = 1024, temperature: float = 0.4
+    ) -> AsyncGenerator[str, None]:
+        """
+        Streaming chat completion: yields text deltas as they are generated
+        messages: same format as chat_completion
+        Errors are raised to the caller (nothing is yielded in their place)
+        """
+        if self.provider == "claude":
+            self.breaker.before_call()
+            system_message, api_messages = _split_system_message(messages)
+
+            logger.info(f"Streaming Claude API with model: {self.claude_model}, temp: {temperature}")
+
+            try:
+                async with self.claude_client.messages.stream(
+                    model=self.claude_model,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    system=_cached_system(system_message),
+                    messages=api_messages,
+                ) as stream:
+                    async for text in stream.text_stream:
+                        yield text
+            except Exception as e:
+                self.breaker.record_failure(e)
+                raise
+            self.breaker.record_success()
+        elif self.provider == "local":
+            # Local generation is not incremental here; emit it in one piece
+            response = await self._chat_completion_local(messages, max_tokens, temperature)
+            yield response["content"]
+        else:
+            raise ValueError(f"Unsupported provider: {self.provider}")
+
     async def _chat_completion_claude(self, messages: list, max_tokens: int, temperature: float = 0.4) -> dict:
         """Chat completion using Claude (Anthropic) API"""
+        self.breaker.before_call()
         try:
-            from anthropic import AsyncAnthropic
-
-            client = AsyncAnthropic(api_key=self.claude_api_key)
-
             # Extract system message if present
-            system_message = None
-            api_messages = []
-            for msg in messages:
-                if msg["role"] == "system":
-                    system_message = msg["content"]
-                else:
-                    api_messages.append(msg)
+            system_message, api_messages = _split_system_message(messages)
 
             logger.info(f"Calling Claude API with model: {self.claude_model}, temp: {temperature}")
 
-            response = await client.messages.create(
+            response = await self.claude_client.messages.create(
                 model=self.claude_model,
                 max_tokens=max_tokens,
                 temperature=temperature,
-                system=system_message if system_message else None,
+                system=_cached_system(system_message),
                 messages=api_messages,
             )
 
+            self.breaker.record_success()
             return {
                 "content": response.content[0].text,
                 "model": self.claude_model,
             }
 
         except Exception as e:
+            self.breaker.record_failure(e)
             logger.error(f"Claude API error: {e}", exc_info=True)
             raise
 
@@ -244,12 +361,7 @@ class LLMEngine:
 
 
 # Global instance
-_llm_engine = None
-
-
+@functools.lru_cache(maxsize=1)
 def get_llm_engine() -> LLMEngine:
     """Get or create global LLM engine instance"""
-    global _llm_engine
-    if _llm_engine is None:
-        _llm_engine = LLMEngine()
-    return _llm_engine
+    return LLMEngine()
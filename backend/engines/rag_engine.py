@@ -1,11 +1,16 @@
+import asyncio
+import functools
 import os
 import chromadb
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass
 import logging
+import re
 import time
 import requests
 
+from backend.engines import RAG_EXECUTOR
+
 logger = logging.getLogger(__name__)
 
 # FastEmbed/Hugging Face need writable cache paths. The API pod runs with a
@@ -20,6 +25,17 @@ for env_name, env_value in {
 }.items():
     os.environ.setdefault(env_name, env_value)
 
+CHROMA_URL_RE = re.compile(r'http://([^:]+):(\d+)')
+
+# Cosine distance (0 = same direction) keeps 1 - distance a usable relevance
+# score. Only applies when a collection is created; existing collections keep
+# their space until reset (rag-pipeline/reset_collection.py) and re-ingested.
+COLLECTION_METADATA = {"hnsw:space": "cosine"}
+
+# Documents embedded and written per Chroma call; keeps embedder memory and
+# request size bounded for large corpora
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "100"))
+
 # Lazy-loaded fastembed model (avoids import cost on every request)
 _fastembed_model = None
 
@@ -52,7 +68,7 @@ class Doc:
 
 class RAGEngine:
     def __init__(self):
-        from backend.settings import CHROMA_URL, CHROMA_DIR
+        from backend.settings import CHROMA_URL, CHROMA_DIR, ensure_data_dirs
 
         # Build ChromaDB URL from CHROMA_HOST + CHROMA_PORT (K8s) or CHROMA_URL
         chroma_host = os.getenv("CHROMA_HOST")
@@ -65,8 +81,7 @@ class RAGEngine:
             logger.info(f"Connected to ChromaDB at {chroma_host}:{chroma_port}")
         elif chroma_url and not chroma_url.startswith("file://"):
             # Parse HTTP URL for host and port
-            import re
-            match = re.match(r'http://([^:]+):(\d+)', chroma_url)
+            match = CHROMA_URL_RE.match(chroma_url)
             if match:
                 host, port = match.groups()
                 self.client = chromadb.HttpClient(host=host, port=int(port))
@@ -76,12 +91,26 @@ class RAGEngine:
         else:
             # Fallback to PersistentClient for local development
             chroma_dir = str(CHROMA_DIR)
-            os.makedirs(chroma_dir, exist_ok=True)
+            ensure_data_dirs()
             self.client = chromadb.PersistentClient(path=chroma_dir)
             logger.info(f"Using local ChromaDB at {chroma_dir}")
 
         self.namespace = os.getenv("RAG_NAMESPACE", "portfolio")
 
+        # Caps concurrent asearch() calls so RAG cannot starve the thread pool
+        self._search_slots = asyncio.Semaphore(
+            int(os.getenv("RAG_MAX_CONCURRENCY", "8"))
+        )
+
+        # Coalesce concurrent asearch() calls into one search_batch()
+        # (RAG_BATCH_WAIT_MS=0 disables batching)
+        batch_wait_ms = float(os.getenv("RAG_BATCH_WAIT_MS", "20"))
+        self._batcher = (
+            RagBatcher(self, max_wait=batch_wait_ms / 1000)
+            if batch_wait_ms > 0
+            else None
+        )
+
         # Initialize with current active collection
         self.active_alias = f"{self.namespace}_active"
         self.collection = self._get_active_collection()
@@ -103,16 +132,21 @@ class RAGEngine:
 
     def _get_embedding(self, text: str) -> List[float]:
         """Get 768-dim embedding from Ollama or fastembed fallback"""
-        # Try Ollama first
+        return self._get_embeddings_batch([text])[0]
+
+    def _get_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+        """Get 768-dim embeddings for multiple texts in one backend call"""
+        # Try Ollama first: /api/embed takes the whole batch in one request
+        # (one forward pass) and returns L2-normalized vectors, like fastembed
         if not self._use_fastembed:
             try:
                 response = requests.post(
-                    f"{self.ollama_url}/api/embeddings",
-                    json={"model": self.embed_model, "prompt": text},
+                    f"{self.ollama_url}/api/embed",
+                    json={"model": self.embed_model, "input": texts},
                     timeout=30
                 )
                 response.raise_for_status()
-                return response.json()["embedding"]
+                return response.json()["embeddings"]
             except Exception as e:
                 logger.warning(f"Ollama embedding failed, switching to fastembed: {e}")
                 self._use_fastembed = True
@@ -120,24 +154,17 @@ class RAGEngine:
         # Fastembed fallback (nomic-embed-text-v1.5, 768-dim, ONNX)
         model = _get_fastembed_model()
         if model:
-            embeddings = list(model.embed([text]))
-            return embeddings[0].tolist()
+            return [e.tolist() for e in model.embed(texts)]
 
         logger.error("No embedding backend available")
-        return [0.0] * 768
-
-    def _get_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
-        """Get embeddings for multiple texts"""
-        if self._use_fastembed:
-            model = _get_fastembed_model()
-            if model:
-                return [e.tolist() for e in model.embed(texts)]
-        return [self._get_embedding(text) for text in texts]
+        return [[0.0] * 768 for _ in texts]
 
     def _get_active_collection(self):
         """Get the currently active collection, creating default if needed"""
         # Always use portfolio_knowledge collection (the one populated by ingestion)
-        return self.client.get_or_create_collection("portfolio_knowledge")
+        return self.client.get_or_create_collection(
+            "portfolio_knowledge", metadata=COLLECTION_METADATA
+        )
 
     def create_version(self, version_id: Optional[str] = None) -> str:
         """Create a new versioned collection for atomic updates"""
@@ -147,7 +174,7 @@ class RAGEngine:
             version_id = f"v{timestamp}"
 
         collection_name = f"{self.namespace}_{version_id}"
-        self.client.get_or_create_collection(collection_name)
+        self.client.get_or_create_collection(collection_name, metadata=COLLECTION_METADATA)
 
         logger.info(f"Created new RAG version: {collection_name}")
         return collection_name
@@ -177,6 +204,25 @@ class RAGEngine:
             logger.error(f"Failed atomic RAG swap to {new_collection_name}: {e}")
             return False
 
+    def _upsert_docs(self, collection, docs: List[Doc]) -> None:
+        """Embed and upsert docs in INGEST_BATCH_SIZE slices"""
+        for start in range(0, len(docs), INGEST_BATCH_SIZE):
+            batch = docs[start:start + INGEST_BATCH_SIZE]
+            texts = [doc.text for doc in batch]
+            collection.upsert(
+                embeddings=self._get_embeddings_batch(texts),
+                documents=texts,
+                metadatas=[
+                    {"source": doc.source, "title": doc.title, "tags": ",".join(doc.tags)}
+                    for doc in batch
+                ],
+                ids=[doc.id for doc in batch],
+            )
+            logger.info(
+                f"Upserted batch {start // INGEST_BATCH_SIZE + 1} "
+                f"({start + len(batch)}/{len(docs)} documents) into {collection.name}"
+            )
+
     def ingest_to_version(self, docs: List[Doc], version_collection_name: str) -> int:
         """Ingest documents to a specific version (for atomic updates)"""
         if not docs:
@@ -188,20 +234,8 @@ class RAGEngine:
             logger.error(f"Version collection not found: {version_collection_name}")
             return 0
 
-        texts = [doc.text for doc in docs]
-        ids = [doc.id for doc in docs]
-        metadatas = [
-            {"source": doc.source, "title": doc.title, "tags": ",".join(doc.tags)}
-            for doc in docs
-        ]
-
-        embeddings = self._get_embeddings_batch(texts)
-
         try:
-            # For versioned ingestion, we typically want clean slate
-            target_collection.add(
-                embeddings=embeddings, documents=texts, metadatas=metadatas, ids=ids
-            )
+            self._upsert_docs(target_collection, docs)
 
             doc_count = target_collection.count()
             logger.info(
@@ -219,24 +253,9 @@ class RAGEngine:
         if not docs:
             return 0
 
-        texts = [doc.text for doc in docs]
-        ids = [doc.id for doc in docs]
-        metadatas = [
-            {"source": doc.source, "title": doc.title, "tags": ",".join(doc.tags)}
-            for doc in docs
-        ]
-
-        embeddings = self._get_embeddings_batch(texts)
-
         try:
-            # Delete existing docs with same IDs first
-            existing_ids = [item["id"] for item in self.collection.get(ids=ids)["ids"]]
-            if existing_ids:
-                self.collection.delete(ids=existing_ids)
-
-            self.collection.add(
-                embeddings=embeddings, documents=texts, metadatas=metadatas, ids=ids
-            )
+            # upsert replaces docs with the same IDs, so no delete pass is needed
+            self._upsert_docs(self.collection, docs)
             logger.info(f"Ingested {len(docs)} documents")
             return len(docs)
         except Exception as e:
@@ -252,23 +271,52 @@ class RAGEngine:
             results = self.collection.query(
                 query_embeddings=[query_embedding], n_results=n_results
             )
-
-            contexts = []
-            for i in range(len(results["documents"][0])):
-                contexts.append(
-                    {
-                        "text": results["documents"][0][i],
-                        "metadata": results["metadatas"][0][i],
-                        "score": (
-                            results["distances"][0][i] if results["distances"] else 0
-                        ),
-                    }
-                )
-            return contexts
+            return self._to_contexts(results, 0)
         except Exception as e:
             logger.error(f"Error searching documents: {e}")
             return []
 
+    async def asearch(self, query: str, n_results: int = 5) -> List[Dict[str, Any]]:
+        """Async search: blocking embed + query run on RAG_EXECUTOR"""
+        if self._batcher is not None:
+            return await self._batcher.submit(query, n_results)
+        async with self._search_slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                RAG_EXECUTOR, self.search, query, n_results
+            )
+
+    def search_batch(
+        self, queries: List[str], n_results: int = 5
+    ) -> List[List[Dict[str, Any]]]:
+        """Search several queries with one embedding batch and one Chroma query"""
+        if not queries:
+            return []
+        try:
+            query_embeddings = self._get_embeddings_batch(queries)
+
+            results = self.collection.query(
+                query_embeddings=query_embeddings, n_results=n_results
+            )
+            return [self._to_contexts(results, row) for row in range(len(queries))]
+        except Exception as e:
+            logger.error(f"Error searching documents (batch of {len(queries)}): {e}")
+            return [[] for _ in queries]
+
+    @staticmethod
+    def _to_contexts(results: Dict[str, Any], row: int) -> List[Dict[str, Any]]:
+        """Flatten one row of a Chroma query result into text/metadata/score dicts"""
+        distances = results["distances"][row] if results["distances"] else None
+        metadatas = results["metadatas"][row]
+        return [
+            {
+                "text": text,
+                "metadata": metadatas[i],
+                "score": distances[i] if distances else 0,
+            }
+            for i, text in enumerate(results["documents"][row])
+        ]
+
 
 def format_prompt(question: str, contexts: List[Dict]) -> str:
     """Format the prompt for Jimmie Coleman persona"""
@@ -279,7 +327,7 @@ def format_prompt(question: str, contexts: List[Dict]) -> str:
         "If unsure, say what you'd try next."
     )
 
-    joined = "\n\n---\n\n".join([c["text"] for c in contexts])
+    joined = "\n\n---\n\n".join(c["text"] for c in contexts)
     return f"""{SYSTEM}
 
 [Context]
@@ -304,15 +352,77 @@ for quality and cost efficiency
 """
 
 
-# Global instance
-_rag_engine = None
+class RagBatcher:
+    """
+    Micro-batches asearch() calls: queries arriving within max_wait (or up
+    to max_batch of them) share one search_batch(), i.e. one embedding
+    batch and one Chroma query.
+    """
+
+    def __init__(self, engine: "RAGEngine", max_batch: int = 16, max_wait: float = 0.02):
+        self.engine = engine
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue: Optional[asyncio.Queue] = None
+        self._collector: Optional[asyncio.Task] = None
+        self._inflight: set = set()
+
+    async def submit(self, query: str, n_results: int) -> List[Dict[str, Any]]:
+        if self._collector is None or self._collector.done():
+            self._queue = asyncio.Queue()
+            self._collector = asyncio.create_task(self._collect())
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((query, n_results, future))
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Dispatch without waiting so the next window starts immediately;
+            # the engine semaphore bounds how many batches run at once
+            task = asyncio.create_task(self._dispatch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, batch):
+        # Skip callers that already gave up (e.g. asearch timeout)
+        batch = [item for item in batch if not item[2].done()]
+        if not batch:
+            return
+        n_results = max(item[1] for item in batch)
+        try:
+            async with self.engine._search_slots:
+                loop = asyncio.get_running_loop()
+                results = await loop.run_in_executor(
+                    RAG_EXECUTOR,
+                    self.engine.search_batch,
+                    [item[0] for item in batch],
+                    n_results,
+                )
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, k, future), docs in zip(batch, results):
+            if not future.done():
+                future.set_result(docs[:k])
 
 
+# Global instance (a failed init raises and is not cached, so it is retried)
+@functools.lru_cache(maxsize=1)
 def get_rag_engine() -> RAGEngine:
-    global _rag_engine
-    if _rag_engine is None:
-        _rag_engine = RAGEngine()
-    return _rag_engine
+    return RAGEngine()
 
 
 def ingest(docs: List[Doc]) -> int:
@@ -0,0 +1,135 @@
+import functools
+import os
+import logging
+from typing import Any, Dict, Optional
+
+from cachetools import TTLCache
+
+logger = logging.getLogger(__name__)
+
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", "3600"))
+MEMORY_MAX_SESSIONS = int(os.getenv("MEMORY_MAX_SESSIONS", "10000"))
+ANSWER_CACHE_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", "600"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000"))
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "20"))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "0.5"))
+
+
+@functools.lru_cache(maxsize=None)
+def _redis_client(url: str):
+    """One bounded connection pool per worker, shared by every store"""
+    # Only import redis when a Redis URL is configured
+    from redis import asyncio as redis_asyncio
+
+    # Short socket timeouts so a slow Redis degrades to a cache miss, not a
+    # hung chat
+    return redis_asyncio.Redis.from_url(
+        url,
+        max_connections=REDIS_MAX_CONNECTIONS,
+        socket_timeout=REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=REDIS_SOCKET_TIMEOUT,
+        health_check_interval=30,
+    )
+
+
+class RedisSessionStore:
+    """
+    Conversation sessions in Redis, msgpack-encoded under {prefix}:{id}.
+    Every write refreshes the TTL, so idle sessions expire on their own and
+    all workers see the same sessions.
+    """
+
+    def __init__(self, url: str, ttl: int = SESSION_TTL_SECONDS, prefix: str = "sess"):
+        import msgpack
+
+        self._msgpack = msgpack
+        self.client = _redis_client(url)
+        self.ttl = ttl
+        self.prefix = prefix
+        logger.info("Using Redis store for %s:*", prefix)
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.prefix}:{session_id}"
+
+    async def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            raw = await self.client.get(self._key(session_id))
+        except Exception as e:
+            logger.warning(f"Session store read failed: {e}")
+            return None
+        if raw is None:
+            return None
+        return self._msgpack.unpackb(raw, raw=False)
+
+    async def set(self, session_id: str, data: Dict[str, Any]) -> None:
+        try:
+            await self.client.set(
+                self._key(session_id),
+                self._msgpack.packb(data, use_bin_type=True),
+                ex=self.ttl,
+            )
+        except Exception as e:
+            logger.warning(f"Session store write failed: {e}")
+
+    async def delete(self, session_id: str) -> None:
+        try:
+            await self.client.delete(self._key(session_id))
+        except Exception as e:
+            logger.warning(f"Session store delete failed: {e}")
+
+    async def count(self) -> Optional[int]:
+        """Not tracked: counting keys would need a full SCAN"""
+        return None
+
+
+class MemorySessionStore:
+    """
+    Per-process fallback (single worker only): a TTLCache with the same TTL
+    as Redis and a hard size cap, evicting least-recently-used sessions
+    """
+
+    def __init__(self, ttl: int = SESSION_TTL_SECONDS, maxsize: int = MEMORY_MAX_SESSIONS):
+        self.ttl = ttl
+        self._sessions = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        return self._sessions.get(session_id)
+
+    async def set(self, session_id: str, data: Dict[str, Any]) -> None:
+        self._sessions[session_id] = data
+
+    async def delete(self, session_id: str) -> None:
+        self._sessions.pop(session_id, None)
+
+    async def count(self) -> Optional[int]:
+        self._sessions.expire()
+        return len(self._sessions)
+
+
+# Global instances
+@functools.lru_cache(maxsize=1)
+def get_session_store():
+    """Redis when REDIS_URL is set, otherwise the in-process fallback"""
+    redis_url = os.getenv("REDIS_URL", "")
+    if redis_url:
+        return RedisSessionStore(redis_url)
+    if int(os.getenv("WEB_CONCURRENCY", "1")) > 1:
+        logger.warning(
+            "WEB_CONCURRENCY > 1 without REDIS_URL: sessions are per worker "
+            "and will be lost when requests land on another worker"
+        )
+    return MemorySessionStore()
+
+
+@functools.lru_cache(maxsize=1)
+def get_answer_cache():
+    """
+    Short-lived LLM answer cache keyed by a hash of the exact prompt, on the
+    same backend as sessions. None when ANSWER_CACHE_TTL_SECONDS is 0.
+    """
+    if ANSWER_CACHE_TTL_SECONDS <= 0:
+        return None
+    redis_url = os.getenv("REDIS_URL", "")
+    if redis_url:
+        return RedisSessionStore(redis_url, ttl=ANSWER_CACHE_TTL_SECONDS, prefix="ans")
+    return MemorySessionStore(ttl=ANSWER_CACHE_TTL_SECONDS, maxsize=ANSWER_CACHE_MAX_ENTRIES)
@@ -1,3 +1,4 @@
+import functools
 import os
 import logging
 
@@ -29,11 +30,6 @@ class SpeechEngine:
 
 
 # Global instance
-_speech_engine = None
-
-
+@functools.lru_cache(maxsize=1)
 def get_speech_engine() -> SpeechEngine:
-    global _speech_engine
-    if _speech_engine is None:
-        _speech_engine = SpeechEngine()
-    return _speech_engine
+    return SpeechEngine()
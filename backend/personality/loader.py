@@ -3,6 +3,7 @@ Personality Loader
 Dynamically loads personality configuration from markdown files
 """
 
+import functools
 from pathlib import Path
 from typing import Dict, Optional
 import re
@@ -122,14 +123,10 @@ IMPORTANT:
 
 
 # Singleton instance
-_loader = None
-
+@functools.lru_cache(maxsize=1)
 def get_personality_loader() -> PersonalityLoader:
     """Get or create personality loader instance"""
-    global _loader
-    if _loader is None:
-        _loader = PersonalityLoader()
-    return _loader
+    return PersonalityLoader()
 
 
 def load_system_prompt() -> str:
@@ -3,9 +3,13 @@ API Settings Configuration
 Centralized configuration management for all services
 """
 
+import functools
+import logging
 import os
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
+
 
 def read_secret(name: str, default: str = "") -> str:
     """Read a secret from NAME or NAME_FILE without logging the value."""
@@ -29,10 +33,13 @@ UPLOAD_DIR = DATA_DIR / "uploads"
 ASSETS_DIR = DATA_DIR / "assets"
 CHROMA_DIR = DATA_DIR / "chroma"
 
-# Create directories if they don't exist
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-ASSETS_DIR.mkdir(parents=True, exist_ok=True)
-CHROMA_DIR.mkdir(parents=True, exist_ok=True)
+
+@functools.lru_cache(maxsize=1)
+def ensure_data_dirs() -> None:
+    """Create the data directories once per process, on first use"""
+    for directory in (UPLOAD_DIR, ASSETS_DIR, CHROMA_DIR):
+        directory.mkdir(parents=True, exist_ok=True)
+
 
 # LLM Configuration - SINGLE SOURCE OF TRUTH
 LLM_PROVIDER = os.getenv("LLM_PROVIDER", "claude")  # claude, openai, or local
@@ -76,7 +83,7 @@ try:
     SYSTEM_PROMPT = load_system_prompt()
 except Exception as e:
     # Fallback if personality files can't be loaded
-    print(f"Warning: Could not load personality from files: {e}")
+    logger.warning("Could not load personality from files: %s", e)
     SYSTEM_PROMPT = """
 You are Sheyla, Jimmie Coleman's AI portfolio assistant. You help visitors \
 learn about his DevSecOps expertise, projects, and technical skills.
@@ -37,6 +37,7 @@ Date: 2026-01-05 (Rewritten with RAG best practices)
 Updated: 2026-01-07 (Timestamped output, auto-move to processed)
 """
 
+import re
 import json
 import hashlib
 import argparse
@@ -166,6 +167,11 @@ PROCESSED_DIR = PIPELINE_ROOT / "04-processed-rag-data"
 
 SUPPORTED_EXTENSIONS = {'.md', '.txt', '.json', '.jsonl'}
 
+# Compiled once - sanitize_text runs over every raw document
+CONTROL_CHARS_RE = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+EXCESS_BLANK_LINES_RE = re.compile(r'\n{3,}')
+SENTENCE_BOUNDARY_RE = re.compile(r'(?<=[.!?])\s+')
+
 
 # =============================================================================
 # Token Counting
@@ -233,14 +239,13 @@ def sanitize_text(text: str) -> str:
         text = ftfy.fix_text(text)
 
     # Remove null bytes and control characters (keep newlines, tabs)
-    text = ''.join(char for char in text if ord(char) >= 32 or char in '\n\t\r')
+    text = CONTROL_CHARS_RE.sub('', text)
 
     # Normalize line endings
     text = text.replace('\r\n', '\n').replace('\r', '\n')
 
     # Remove excessive blank lines (max 2 consecutive)
-    while '\n\n\n' in text:
-        text = text.replace('\n\n\n', '\n\n')
+    text = EXCESS_BLANK_LINES_RE.sub('\n\n', text)
 
     # Strip leading/trailing whitespace
     text = text.strip()
@@ -301,8 +306,7 @@ def split_by_sentences(text: str) -> List[str]:
             pass
 
     # Basic sentence splitting
-    import re
-    sentences = re.split(r'(?<=[.!?])\s+', text)
+    sentences = SENTENCE_BOUNDARY_RE.split(text)
     return [s.strip() for s in sentences if s.strip()]
 
 
@@ -13,7 +13,7 @@ FLOW:
 What this does:
   1. LOAD     - Find and read prepared_*.jsonl files (pre-chunked, deduplicated)
   2. EMBED    - Generate 768-dim vectors via Ollama nomic-embed-text
-  3. STORE    - Upsert chunks into ChromaDB collection
+  3. STORE    - Upsert chunks into ChromaDB collection (embed+store per batch)
   4. MOVE     - Move processed JSONL to 04-processed-rag-data/
 
 Note: Chunking is already done by prepare_data.py. This script only embeds.
@@ -25,6 +25,7 @@ Usage:
   python ingest_data.py --batch-size 50    # Custom batch size
   python ingest_data.py --dry-run          # Preview without storing
   python ingest_data.py --stats            # Show collection stats
+  python ingest_data.py --force            # Re-embed unchanged chunks too
 
 Environment Variables:
   CHROMA_URL    - ChromaDB server URL (e.g., http://chroma:8000)
@@ -33,7 +34,7 @@ Environment Variables:
   EMBED_MODEL   - Embedding model (default: nomic-embed-text)
 
 Requirements:
-  - Ollama running with nomic-embed-text model
+  - Ollama (0.3+, for batch /api/embed) running with nomic-embed-text model
   - ChromaDB (local or Kubernetes service)
   - prepared_*.jsonl file(s) from prepare_data.py
 
@@ -50,7 +51,7 @@ import requests
 import chromadb
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 
 # =============================================================================
 # CONFIGURATION
@@ -182,7 +183,7 @@ def load_manifest() -> Optional[Dict[str, Any]]:
 
 
 # =============================================================================
-# STAGE 2: EMBED - Generate vectors via Ollama
+# STAGE 2: EMBED + STORE - Generate vectors via Ollama, upsert to ChromaDB
 # =============================================================================
 
 def check_ollama_ready() -> bool:
@@ -203,92 +204,145 @@ def check_ollama_ready() -> bool:
         return False
 
 
-def get_embedding(text: str) -> Optional[List[float]]:
-    """Get embedding from Ollama"""
-    try:
-        response = requests.post(
-            f"{OLLAMA_URL}/api/embeddings",
-            json={"model": EMBED_MODEL, "prompt": text},
-            timeout=60
-        )
-        response.raise_for_status()
-        embedding = response.json().get("embedding")
-        if embedding and len(embedding) == EMBED_DIMS:
-            return embedding
-        else:
-            print(f"  Unexpected embedding dimension: {len(embedding) if embedding else 0}")
-            return None
-    except Exception as e:
-        print(f"  Embedding failed: {e}")
-        return None
-
-
-def embed_chunks(chunks: List[Dict[str, Any]], batch_size: int = DEFAULT_BATCH_SIZE) -> List[Dict[str, Any]]:
-    """Generate embeddings for all chunks with progress"""
-    embedded = []
-    total = len(chunks)
-
-    for i, chunk in enumerate(chunks):
-        # Progress indicator
-        pct = int((i / total) * 100) if total > 0 else 0
-        print(f"  Embedding chunk {i+1}/{total} ({pct}%)...", end='\r')
-
-        embedding = get_embedding(chunk['content'])
-        if embedding:
-            chunk['embedding'] = embedding
-            embedded.append(chunk)
-        else:
-            print(f"\n  Skipping chunk {chunk['id'][:8]}... - embedding failed")
+def _embed_request(texts: List[str]) -> List[List[float]]:
+    """One Ollama /api/embed call; raises on HTTP errors or a wrong shape"""
+    # /api/embed returns L2-normalized vectors, matching the API's query side
+    response = requests.post(
+        f"{OLLAMA_URL}/api/embed",
+        json={"model": EMBED_MODEL, "input": texts},
+        timeout=120
+    )
+    response.raise_for_status()
+    embeddings = response.json().get("embeddings") or []
+    if len(embeddings) != len(texts) or any(len(e) != EMBED_DIMS for e in embeddings):
+        raise ValueError(f"unexpected embedding shape: {len(embeddings)} vectors for {len(texts)} texts")
+    return embeddings
 
-    print(f"  Embedded {len(embedded)}/{total} chunks successfully" + " " * 20)
-    return embedded
 
+def get_embeddings(texts: List[str]) -> List[Optional[List[float]]]:
+    """
+    Get embeddings for a batch of texts from Ollama in one request.
 
-# =============================================================================
-# STAGE 3: STORE - Upsert to ChromaDB
-# =============================================================================
+    If the batch call fails (one oversized input, a timeout, a bad shape),
+    each text is retried on its own so only the failing ones come back as
+    None instead of the whole batch being lost.
+    """
+    try:
+        return _embed_request(texts)
+    except Exception as e:
+        print(f"  Batch embedding failed ({e}); retrying {len(texts)} texts individually")
 
-def store_chunks(client, chunks: List[Dict[str, Any]], batch_size: int = DEFAULT_BATCH_SIZE) -> int:
-    """Store embedded chunks in ChromaDB with batching"""
+    embeddings: List[Optional[List[float]]] = []
+    for text in texts:
+        try:
+            embeddings.append(_embed_request([text])[0])
+        except Exception as e:
+            print(f"  Embedding failed: {e}")
+            embeddings.append(None)
+    return embeddings
+
+
+def _chunk_metadata(c: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten chunk metadata for ChromaDB (no nested dicts)"""
+    meta = {
+        'source': c.get('source', c.get('source_file', '')),
+        'chunk_index': c.get('chunk_index', 0),
+        'token_count': c.get('token_count', 0),
+        'char_count': c.get('char_count', len(c.get('content', ''))),
+        'total_chunks': c.get('total_chunks', 0),
+        'ingested_at': datetime.now().isoformat()
+    }
+    # Add optional fields if present
+    if 'source_title' in c:
+        meta['title'] = c['source_title']
+    if 'content_hash' in c:
+        meta['content_hash'] = c['content_hash']
+    return meta
+
+
+def _unchanged_ids(collection, batch: List[Dict[str, Any]]) -> set:
+    """IDs in batch already stored with the same content_hash"""
+    hashes = {c['id']: c.get('content_hash') for c in batch if c.get('content_hash')}
+    if not hashes:
+        return set()
+    existing = collection.get(ids=list(hashes), include=["metadatas"])
+    return {
+        doc_id
+        for doc_id, meta in zip(existing["ids"], existing["metadatas"])
+        if meta and meta.get('content_hash') == hashes[doc_id]
+    }
+
+
+def embed_and_store(client, chunks: List[Dict[str, Any]], batch_size: int = DEFAULT_BATCH_SIZE,
+                    force: bool = False) -> Tuple[int, int, int, int]:
+    """
+    Embed and upsert chunks one batch at a time.
+
+    Only a single batch of vectors is alive at once, so peak memory is
+    bounded by batch_size instead of by the size of the prepared file.
+    Chunks already stored with the same content_hash are skipped (no
+    re-embedding) unless force is set; duplicate IDs within a run are
+    embedded once.
+
+    Returns:
+        (embedded, stored, skipped, failed): chunks embedded, chunks stored,
+        chunks skipped as unchanged, and chunks that failed to embed or
+        store (a non-zero failed keeps the file out of 04-processed)
+    """
     if not chunks:
-        return 0
+        return 0, 0, 0, 0
+
+    # Same ID means same content (IDs embed the content hash); keep the first
+    seen_ids = set()
+    unique_chunks = []
+    for c in chunks:
+        if c['id'] not in seen_ids:
+            seen_ids.add(c['id'])
+            unique_chunks.append(c)
+    chunks = unique_chunks
 
     collection = client.get_or_create_collection(
         name=COLLECTION_NAME,
-        metadata={"description": "Portfolio knowledge base for RAG"}
+        # Must match backend/engines/rag_engine.py COLLECTION_METADATA
+        metadata={"description": "Portfolio knowledge base for RAG", "hnsw:space": "cosine"}
     )
 
+    embedded_total = 0
     stored = 0
+    skipped = 0
+    failed = 0
     total_batches = (len(chunks) + batch_size - 1) // batch_size
 
     for batch_num in range(total_batches):
         start = batch_num * batch_size
-        end = min(start + batch_size, len(chunks))
-        batch = chunks[start:end]
-
-        # Prepare batch data
-        ids = [c['id'] for c in batch]
-        embeddings = [c['embedding'] for c in batch]
-        documents = [c['content'] for c in batch]
-        metadatas = []
-
-        for c in batch:
-            # Flatten metadata for ChromaDB (no nested dicts)
-            meta = {
-                'source': c.get('source', c.get('source_file', '')),
-                'chunk_index': c.get('chunk_index', 0),
-                'token_count': c.get('token_count', 0),
-                'char_count': c.get('char_count', len(c.get('content', ''))),
-                'total_chunks': c.get('total_chunks', 0),
-                'ingested_at': datetime.now().isoformat()
-            }
-            # Add optional fields if present
-            if 'source_title' in c:
-                meta['title'] = c['source_title']
-            if 'content_hash' in c:
-                meta['content_hash'] = c['content_hash']
-
-            metadatas.append(meta)
+        batch = chunks[start:start + batch_size]
+
+        if not force:
+            unchanged = _unchanged_ids(collection, batch)
+            if unchanged:
+                skipped += len(unchanged)
+                batch = [c for c in batch if c['id'] not in unchanged]
+            if not batch:
+                print(f"  Batch {batch_num + 1}/{total_batches}: all chunks unchanged, skipped")
+                continue
+
+        vectors = get_embeddings([c['content'] for c in batch])
+        ids, embeddings, documents, metadatas = [], [], [], []
+        for c, embedding in zip(batch, vectors):
+            if embedding is None:
+                print(f"  Skipping chunk {c['id'][:8]}... - embedding failed")
+                continue
+            ids.append(c['id'])
+            embeddings.append(embedding)
+            documents.append(c['content'])
+            metadatas.append(_chunk_metadata(c))
+
+        embed_failed = len(batch) - len(ids)
+        failed += embed_failed
+        embedded_total += len(ids)
+        if not ids:
+            print(f"  Batch {batch_num + 1}/{total_batches}: no chunks embedded ({embed_failed} failed)")
+            continue
 
         try:
             # Upsert handles both add and update
@@ -298,12 +352,14 @@ def store_chunks(client, chunks: List[Dict[str, Any]], batch_size: int = DEFAULT
                 documents=documents,
                 metadatas=metadatas
             )
-            stored += len(batch)
-            print(f"  Batch {batch_num + 1}/{total_batches}: stored {len(batch)} chunks")
+            stored += len(ids)
+            note = f", {embed_failed} failed to embed" if embed_failed else ""
+            print(f"  Batch {batch_num + 1}/{total_batches}: embedded and stored {len(ids)} chunks{note}")
         except Exception as e:
+            failed += len(ids)
             print(f"  Error storing batch {batch_num + 1}: {e}")
 
-    return stored
+    return embedded_total, stored, skipped, failed
 
 
 def get_collection_stats(client) -> Dict[str, Any]:
@@ -312,8 +368,9 @@ def get_collection_stats(client) -> Dict[str, Any]:
         collection = client.get_or_create_collection(COLLECTION_NAME)
         count = collection.count()
 
-        # Get sample of sources
-        sample = collection.peek(limit=10)
+        # Get sample of sources (metadata only; peek() would also pull
+        # embeddings and documents)
+        sample = collection.get(limit=10, include=["metadatas"])
         sources = set()
         if sample and 'metadatas' in sample:
             for meta in sample['metadatas']:
@@ -344,6 +401,8 @@ def main():
                         help='Specific prepared_*.jsonl file to ingest')
     parser.add_argument('--no-move', action='store_true',
                         help='Do not move files after ingestion (for multi-target sync)')
+    parser.add_argument('--force', action='store_true',
+                        help='Re-embed chunks even if already stored with the same content hash')
     args = parser.parse_args()
 
     print_header("RAG PIPELINE: INGEST DATA")
@@ -405,6 +464,7 @@ def main():
     total_loaded = 0
     total_embedded = 0
     total_stored = 0
+    total_failed = 0
     files_processed = []
 
     for chunks_file in prepared_files:
@@ -433,21 +493,28 @@ def main():
             print(f"\n  [DRY RUN] Would embed and store {len(chunks)} chunks from {chunks_file.name}")
             continue
 
-        # Stage 2: Embed
-        print_stage(2, "EMBED - Generating vectors via Ollama")
-        embedded_chunks = embed_chunks(chunks, batch_size=args.batch_size)
+        # Stage 2+3: Embed and store, one batch at a time
+        print_stage(2, "EMBED + STORE - Generating vectors and upserting in batches")
+        client = get_chroma_client()
+        embedded, stored, skipped, failed = embed_and_store(
+            client, chunks, batch_size=args.batch_size, force=args.force
+        )
+        if skipped:
+            print(f"  Skipped {skipped} unchanged chunks (use --force to re-embed)")
+
+        total_embedded += embedded
+        total_stored += stored
+        total_failed += failed
 
-        if not embedded_chunks:
-            print(f"  Warning: No chunks embedded from {chunks_file.name}")
+        if failed:
+            # Keep the file in place: a re-run only embeds what is missing
+            print(f"  Warning: {failed} chunks from {chunks_file.name} failed; "
+                  f"leaving it in 02-prepared-rag-data/ for a re-run")
             continue
 
-        total_embedded += len(embedded_chunks)
-
-        # Stage 3: Store
-        print_stage(3, "STORE - Upserting to ChromaDB")
-        client = get_chroma_client()
-        stored = store_chunks(client, embedded_chunks, batch_size=args.batch_size)
-        total_stored += stored
+        if not embedded and not skipped:
+            print(f"  Warning: No chunks embedded from {chunks_file.name}")
+            continue
 
         # Track for moving
         files_processed.append(chunks_file)
@@ -482,6 +549,8 @@ def main():
     print(f"     Chunks loaded:    {total_loaded}")
     print(f"     Chunks embedded:  {total_embedded}")
     print(f"     Chunks stored:    {total_stored}")
+    if total_failed:
+        print(f"     Chunks failed:    {total_failed}")
     print(f"\n  Collection: {COLLECTION_NAME}")
     print(f"  Total documents: {final_stats.get('total_documents', 'N/A')}")
     print(f"\n  Your RAG knowledge base is ready!")